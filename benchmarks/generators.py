@@ -0,0 +1,184 @@
+# benchmarks/generators.py
+"""
+Synthetic, seeded inputs shaped like the real sources:
+- ELSTAT building permits workbook (title rows, header, annual totals, monthly rows)
+- Bank of Greece apartment price PDF (II.6 Greece + II.7 / II.7.1 / II.7.2 by area)
+- "DB" files (CSV / Excel) of any size, plus an extracted frame that revises some
+  values and adds new periods
+"""
+from __future__ import annotations
+
+import random
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import openpyxl
+import pandas as pd
+
+from benchmarks.pdfgen import write_table_pdf
+from etl.core.excel_writer import write_new_workbook
+
+PERMITS_KEYS = ["Year", "Month"]
+PERMITS_VALUES = ["Permits Number", "Area", "Volume"]
+
+APARTMENTS_KEYS = ["Year", "Quarter", "Region"]
+APARTMENTS_VALUES = ["Index", "Up To 5 Years Old Index", "Over 5 Years Old Index"]
+APARTMENTS_REGIONS = ["Athens", "Greece", "Other Areas", "Other Cities", "Thessaloniki"]
+
+_ROMAN = ["I", "II", "III", "IV"]
+
+
+# ---- ELSTAT building permits workbook ----
+
+def write_permits_workbook(path: Path, years: int, *, start_year: int = 1990, seed: int = 0, messy: bool = True) -> Path:
+    """
+    One sheet laid out like the ELSTAT file: title block, header row, then per year an
+    "Annual Total" row and 12 monthly rows (year only on the total row).
+    messy: a few thousands-separated strings and blank cells, as in the real file.
+
+    Written as .xlsx (no .xls writer is available without extra dependencies); the
+    extractor reads both through etl.core.excel_reader.
+    """
+    r = random.Random(seed)
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Sheet1")
+    ws.append(["HELLENIC STATISTICAL AUTHORITY"])
+    ws.append([])
+    ws.append(["Building activity: permits, area and volume"])
+    ws.append([])
+    ws.append([])
+    ws.append([])
+    ws.append(["Year", "Month", "Number of permits", "Area (m2)", "Volume (m3)", "Notes"])
+    for y in range(start_year, start_year + years):
+        ws.append([y, "Annual Total", r.randint(10_000, 50_000), r.randint(10**6, 10**7), r.randint(10**7, 10**8), None])
+        for m in range(1, 13):
+            vals: List[object] = [r.randint(100, 5_000), r.randint(10**4, 10**6), r.randint(10**5, 10**7)]
+            if messy and r.random() < 0.05:
+                vals[1] = f"{vals[1]:,}"
+            if messy and r.random() < 0.02:
+                vals[2] = None
+            ws.append([None, m, *vals, "x" if r.random() < 0.1 else None])
+    ws.append(["Source: ELSTAT"])
+    ws.append([None, "Note: provisional data"])
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    wb.save(path)
+    return path
+
+
+# ---- Bank of Greece PDF ----
+
+def _index_cell(r: random.Random) -> str:
+    # BoG prints decimals with a comma
+    return f"{r.uniform(50, 150):.1f}".replace(".", ",")
+
+
+def ii6_rows(years: Sequence[int], *, seed: int = 0) -> List[List[str]]:
+    """II.6 (Greece): a year row, then rows I..IV with 9 value columns."""
+    r = random.Random(seed)
+    rows = [["Year / quarter"] + [f"c{i}" for i in range(1, 10)]]
+    for y in years:
+        rows.append([str(y)] + [""] * 9)
+        for q in _ROMAN:
+            rows.append([q + ("*" if y == years[-1] and q == "IV" else "")] + [_index_cell(r) for _ in range(9)])
+    rows.append(["Source: Bank of Greece"] + [""] * 9)
+    return rows
+
+
+def geo_rows(years: Sequence[int], *, seed: int = 1) -> List[List[str]]:
+    """II.7-style (4 areas x 3 sub-columns): "2010 I" then II..IV."""
+    r = random.Random(seed)
+    rows = [["Year / quarter"] + [f"c{i}" for i in range(1, 13)]]
+    for y in years:
+        for i, q in enumerate(_ROMAN):
+            rows.append([f"{y} {q}" if i == 0 else q] + [_index_cell(r) for _ in range(12)])
+    rows.append(["Source: Bank of Greece"] + [""] * 12)
+    return rows
+
+
+def write_bog_pdf(path: Path, years: int, *, start_year: int = 1997, seed: int = 0) -> Path:
+    """Four pages: II.6, II.7, II.7.1, II.7.2 (what extract_apartment_indices reads)."""
+    ys = list(range(start_year, start_year + years))
+    pages = [ii6_rows(ys, seed=seed)] + [geo_rows(ys, seed=seed + k) for k in (1, 2, 3)]
+    return write_table_pdf(path, pages)
+
+
+# ---- DB files + extracted frames ----
+
+def permits_frame(n_rows: int, *, start_year: int = 1000, seed: int = 0) -> pd.DataFrame:
+    """n_rows monthly rows (years are synthetic: 10^6 rows span ~83k years)."""
+    rng = np.random.default_rng(seed)
+    i = np.arange(n_rows)
+    return pd.DataFrame({
+        "Year": start_year + i // 12,
+        "Month": i % 12 + 1,
+        "Permits Number": rng.integers(100, 5_000, n_rows),
+        "Area": rng.integers(10**4, 10**6, n_rows),
+        "Volume": rng.integers(10**5, 10**7, n_rows),
+    })
+
+
+def apartments_frame(n_rows: int, *, start_year: int = 1000, seed: int = 0) -> pd.DataFrame:
+    """n_rows quarterly rows across the five regions."""
+    rng = np.random.default_rng(seed)
+    i = np.arange(n_rows)
+    per_year = 4 * len(APARTMENTS_REGIONS)
+    df = pd.DataFrame({
+        "Year": start_year + i // per_year,
+        "Quarter": (i // len(APARTMENTS_REGIONS)) % 4 + 1,
+        "Region": np.array(APARTMENTS_REGIONS, dtype=object)[i % len(APARTMENTS_REGIONS)],
+    })
+    for c in APARTMENTS_VALUES:
+        df[c] = np.round(rng.uniform(50, 150, n_rows), 1)
+    return df
+
+
+def revise(
+    df: pd.DataFrame,
+    val_cols: Sequence[str],
+    *,
+    changed_frac: float = 0.01,
+    new_rows: Optional[pd.DataFrame] = None,
+    seed: int = 0,
+) -> pd.DataFrame:
+    """A new "extract": changed_frac of the cells of val_cols revised, new_rows appended."""
+    rng = np.random.default_rng(seed)
+    out = df.copy()
+    for c in val_cols:
+        mask = rng.random(len(out)) < changed_frac
+        if pd.api.types.is_integer_dtype(out[c].dtype):
+            out.loc[mask, c] = out.loc[mask, c] + 1
+        else:
+            out.loc[mask, c] = np.round(out.loc[mask, c] + 0.1, 1)
+    if new_rows is not None:
+        out = pd.concat([out, new_rows], ignore_index=True)
+    return out
+
+
+def db_and_extract(kind: str, n_rows: int, *, new_periods: int = 2, seed: int = 0) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """(DB frame, extracted frame) for kind "permits" or "apartments"."""
+    if kind == "permits":
+        full = permits_frame(n_rows + 12 * new_periods, seed=seed)
+        n_new, vals = 12 * new_periods, PERMITS_VALUES
+    elif kind == "apartments":
+        per = 4 * len(APARTMENTS_REGIONS)
+        full = apartments_frame(n_rows + per * new_periods, seed=seed)
+        n_new, vals = per * new_periods, APARTMENTS_VALUES
+    else:
+        raise ValueError(f"Unknown kind: {kind}")
+    db = full.iloc[:n_rows].reset_index(drop=True)
+    extracted = revise(db, vals, new_rows=full.iloc[n_rows:n_rows + n_new], seed=seed + 1)
+    return db, extracted
+
+
+def write_db_csv(df: pd.DataFrame, path: Path) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(path, index=False)
+    return path
+
+
+def write_db_excel(df: pd.DataFrame, path: Path, *, sheet: str = "Sheet1") -> Path:
+    return write_new_workbook(df, path, sheet=sheet)
@@ -0,0 +1,83 @@
+# benchmarks/pdfgen.py
+"""
+Minimal PDF writer for synthetic inputs: one ruled table per page, Helvetica text.
+Enough structure for pdfplumber's line-based table finder; no external dependency.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+Rows = Sequence[Sequence[Optional[str]]]
+
+
+def _esc(s: str) -> str:
+    return s.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _latin1(s: str) -> str:
+    # base-14 fonts only cover Latin-1; Greek (e.g. "Πηγή") would not render anyway
+    return s.encode("latin-1", "replace").decode("latin-1")
+
+
+def table_stream(rows: Rows, *, x0: float, y_top: float, col_w: float, row_h: float, font: float) -> bytes:
+    ncols = max(len(r) for r in rows)
+    width = ncols * col_w
+    height = len(rows) * row_h
+    ops: List[str] = ["0.5 w"]
+    for i in range(len(rows) + 1):
+        y = y_top - i * row_h
+        ops.append(f"{x0} {y} m {x0 + width} {y} l S")
+    for j in range(ncols + 1):
+        x = x0 + j * col_w
+        ops.append(f"{x} {y_top} m {x} {y_top - height} l S")
+    for i, row in enumerate(rows):
+        for j, cell in enumerate(row):
+            if cell is None or cell == "":
+                continue
+            text = _esc(_latin1(str(cell)))
+            ops.append(f"BT /F1 {font} Tf {x0 + j * col_w + 2} {y_top - (i + 1) * row_h + 2} Td ({text}) Tj ET")
+    return "\n".join(ops).encode("latin-1")
+
+
+def write_table_pdf(
+    path: Path,
+    pages: Sequence[Rows],
+    *,
+    col_w: float = 42,
+    row_h: float = 9,
+    font: float = 5,
+    margin: float = 30,
+) -> Path:
+    """One page per table; each page is as tall as its table needs."""
+    objs: List[bytes] = [b"<< /Type /Catalog /Pages 2 0 R >>"]
+    kids = " ".join(f"{4 + 2 * i} 0 R" for i in range(len(pages)))
+    objs.append(f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>".encode())
+    objs.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    for i, rows in enumerate(pages):
+        ncols = max(len(r) for r in rows)
+        w = ncols * col_w + 2 * margin
+        h = len(rows) * row_h + 2 * margin
+        stream = table_stream(rows, x0=margin, y_top=h - margin, col_w=col_w, row_h=row_h, font=font)
+        objs.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {w:.0f} {h:.0f}] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>".encode()
+        )
+        objs.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for k, obj in enumerate(objs, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % k + obj + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objs) + 1)
+    for off in offsets:
+        out += b"%010d 00000 n \n" % off
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objs) + 1, xref)
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(bytes(out))
+    return path
@@ -0,0 +1,293 @@
+# benchmarks/run.py
+"""
+Benchmark the hot paths on synthetic inputs (no network):
+
+    python -m benchmarks.run --scale small
+    python -m benchmarks.run --scale medium --save-baseline
+    python -m benchmarks.run --scale medium            # compare against the saved baseline
+
+Each case runs `--repeat` times (best wall time is kept, with its stage breakdown),
+then once more under tracemalloc for peak memory. With a baseline for the same scale,
+cases slower than baseline * (1 + --time-threshold) or using more than
+baseline * (1 + --mem-threshold) memory are reported as regressions (exit code 1).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks import generators as gen
+from etl.core.compare_csv import compare_and_update_csv
+from etl.core.compare_db import compare_and_update_db
+from etl.core.compare_excel import compare_and_update_excel
+from etl.core.db_snapshot import DbSnapshotCache
+from etl.core.fingerprint import dataframe_sha256, partition_sha256
+from etl.core.metrics import NULL_METRICS, RunMetrics
+from etl.core.storage import open_store
+from etl.core.textfmt import format_table
+from etl.pipelines.ed_apartments_price_index_table.extract import extract_apartment_indices
+from etl.pipelines.ed_building_permits_table.extract import extract_building_permits
+
+BASELINE_DIR = Path("benchmarks/baselines")
+RESULTS_DIR = Path("data/benchmarks")
+
+SCALES: Dict[str, Dict[str, int]] = {
+    # permit_years: rows of the ELSTAT sheet = 13 * years; bog_years: 5 rows per year on II.6
+    # db_rows: CSV DB / fingerprint frame; excel_rows: Excel DB (openpyxl loads it whole)
+    "small": {"permit_years": 20, "bog_years": 10, "db_rows": 1_000, "excel_rows": 1_000},
+    "medium": {"permit_years": 60, "bog_years": 30, "db_rows": 100_000, "excel_rows": 20_000},
+    "large": {"permit_years": 120, "bog_years": 60, "db_rows": 1_000_000, "excel_rows": 100_000},
+}
+
+# differences below this many seconds are noise, never a regression
+MIN_DELTA_S = 0.005
+
+
+@dataclass
+class CaseResult:
+    name: str
+    rows: int
+    wall_s: float
+    wall_median_s: float
+    cpu_s: float
+    peak_mem_bytes: int
+    stages: Dict[str, float] = field(default_factory=dict)
+
+
+@dataclass
+class Case:
+    name: str
+    rows: int
+    fn: Callable[[RunMetrics], Any]
+
+
+def build_cases(work: Path, scale: Dict[str, int]) -> List[Case]:
+    """Generate the inputs under `work` and return the cases that use them."""
+    permits_xlsx = gen.write_permits_workbook(work / "permits.xlsx", scale["permit_years"])
+    bog_pdf = gen.write_bog_pdf(work / "bog.pdf", scale["bog_years"])
+
+    csv_db, csv_new = gen.db_and_extract("permits", scale["db_rows"])
+    csv_db_path = gen.write_db_csv(csv_db, work / "db" / "permits.csv")
+
+    xl_db, xl_new = gen.db_and_extract("apartments", scale["excel_rows"])
+    xl_db_path = gen.write_db_excel(xl_db, work / "db" / "apartments.xlsx")
+
+    # the same permits DB as a keyed SQLite table
+    store_seed = work / "db" / "permits_seed.sqlite"
+    open_store(store_seed).upsert("permits", csv_db, gen.PERMITS_KEYS)
+    last_year = int(csv_db["Year"].max())
+
+    out = work / "out"
+    snapshots = DbSnapshotCache(work / "db_snapshots")
+
+    # cold: the DB is parsed every time; cached: read_db is a DbSnapshotCache hit
+    def compare_csv(m: RunMetrics, cached: bool = False):
+        return compare_and_update_csv(
+            csv_db_path, csv_new, out / "permits.csv", out / "permits_report.csv",
+            metrics=m, db_cache=snapshots, cache_db=cached,
+        )
+
+    def compare_excel(m: RunMetrics, cached: bool = False):
+        return compare_and_update_excel(
+            xl_db_path, "Sheet1", xl_new, out / "apartments.xlsx", out / "apartments_report.csv",
+            metrics=m, db_cache=snapshots, cache_db=cached,
+        )
+
+    # every call starts from the seeded store, so each repeat upserts the same rows
+    def compare_db(m: RunMetrics):
+        path = shutil.copyfile(store_seed, work / "db" / "permits.sqlite")
+        return compare_and_update_db(
+            open_store(path), "permits", csv_new, out / "permits_db_report.csv",
+            key_cols=gen.PERMITS_KEYS, val_cols=gen.PERMITS_VALUES, metrics=m,
+        )
+
+    compare_csv(NULL_METRICS, cached=True)
+    compare_excel(NULL_METRICS, cached=True)
+
+    return [
+        Case("extract_permits", 13 * scale["permit_years"], lambda m: extract_building_permits(permits_xlsx)),
+        Case("extract_apartments", 25 * scale["bog_years"], lambda m: extract_apartment_indices(bog_pdf)),
+        Case("compare_csv", len(csv_new), compare_csv),
+        Case("compare_excel", len(xl_new), compare_excel),
+        Case("compare_csv_cached", len(csv_new), lambda m: compare_csv(m, cached=True)),
+        Case("compare_excel_cached", len(xl_new), lambda m: compare_excel(m, cached=True)),
+        Case("compare_db", len(csv_new), compare_db),
+        Case(
+            "store_read_range",
+            12 * 2,
+            lambda m: open_store(store_seed).read(
+                "permits", period_cols=gen.PERMITS_KEYS, start=(last_year - 1, 1), end=(last_year, 12)
+            ),
+        ),
+        Case(
+            "fingerprint_columnar",
+            len(csv_new),
+            lambda m: dataframe_sha256(csv_new, sort_cols=gen.PERMITS_KEYS, mode="columnar"),
+        ),
+        Case(
+            "fingerprint_legacy",
+            len(csv_new),
+            lambda m: dataframe_sha256(csv_new, sort_cols=gen.PERMITS_KEYS, mode="legacy"),
+        ),
+        Case(
+            "partition_hashes",
+            len(csv_new),
+            lambda m: partition_sha256(csv_new, gen.PERMITS_KEYS, sort_cols=gen.PERMITS_KEYS),
+        ),
+    ]
+
+
+def measure(case: Case, repeat: int) -> CaseResult:
+    walls: List[float] = []
+    best: Optional[RunMetrics] = None
+    best_cpu = 0.0
+    for _ in range(max(1, repeat)):
+        m = RunMetrics(case.name)
+        w0, c0 = time.perf_counter(), time.process_time()
+        case.fn(m)
+        wall, cpu = time.perf_counter() - w0, time.process_time() - c0
+        if not walls or wall < min(walls):
+            best, best_cpu = m, cpu
+        walls.append(wall)
+
+    # separate pass: tracemalloc slows allocation down, keep it out of the timings
+    tracemalloc.start()
+    try:
+        case.fn(NULL_METRICS)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return CaseResult(
+        name=case.name,
+        rows=case.rows,
+        wall_s=min(walls),
+        wall_median_s=statistics.median(walls),
+        cpu_s=best_cpu,
+        peak_mem_bytes=peak,
+        stages={s.name: s.wall_s for s in best.spans} if best else {},
+    )
+
+
+def compare_to_baseline(
+    results: List[CaseResult],
+    baseline: Dict[str, Any],
+    *,
+    time_threshold: float,
+    mem_threshold: float,
+) -> List[str]:
+    """Regression messages (empty = all within thresholds)."""
+    base = baseline.get("results", {})
+    problems: List[str] = []
+    for r in results:
+        b = base.get(r.name)
+        if not b:
+            continue
+        if r.wall_s > b["wall_s"] * (1 + time_threshold) and r.wall_s - b["wall_s"] > MIN_DELTA_S:
+            problems.append(f"{r.name}: time {b['wall_s']:.4f}s -> {r.wall_s:.4f}s (x{r.wall_s / b['wall_s']:.2f})")
+        if b.get("peak_mem_bytes") and r.peak_mem_bytes > b["peak_mem_bytes"] * (1 + mem_threshold):
+            problems.append(
+                f"{r.name}: memory {b['peak_mem_bytes'] / 2**20:.1f} MiB -> {r.peak_mem_bytes / 2**20:.1f} MiB"
+            )
+    return problems
+
+
+def format_results(results: List[CaseResult], baseline: Optional[Dict[str, Any]] = None) -> str:
+    base = (baseline or {}).get("results", {})
+    rows = []
+    for r in results:
+        b = base.get(r.name)
+        rows.append((
+            r.name,
+            str(r.rows),
+            f"{r.wall_s:.4f}s",
+            f"{r.wall_median_s:.4f}s",
+            f"{r.cpu_s:.4f}s",
+            f"{r.peak_mem_bytes / 2**20:.1f}",
+            f"x{r.wall_s / b['wall_s']:.2f}" if b and b.get("wall_s") else "-",
+            " ".join(f"{k}={v:.3f}" for k, v in r.stages.items()),
+        ))
+    return format_table(rows, ("case", "rows", "best", "median", "cpu", "peak MiB", "vs base", "stages"))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(description="Benchmarks on synthetic ELSTAT / Bank of Greece inputs")
+    p.add_argument("--scale", choices=sorted(SCALES), default="small")
+    p.add_argument("--db-rows", type=int, default=None, help="override the CSV DB size of the scale")
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--only", nargs="*", default=None, help="case names to run")
+    p.add_argument("--baseline", type=Path, default=None, help="default: benchmarks/baselines/<scale>.json")
+    p.add_argument("--save-baseline", action="store_true", help="write the results as the new baseline")
+    p.add_argument("--time-threshold", type=float, default=0.25, help="allowed slowdown, 0.25 = +25%%")
+    p.add_argument("--mem-threshold", type=float, default=0.25, help="allowed peak memory growth")
+    args = p.parse_args(argv)
+
+    scale = dict(SCALES[args.scale])
+    if args.db_rows:
+        scale["db_rows"] = args.db_rows
+    baseline_path = args.baseline or BASELINE_DIR / f"{args.scale}.json"
+
+    with tempfile.TemporaryDirectory(prefix="etl-bench-") as tmp:
+        t0 = time.perf_counter()
+        cases = build_cases(Path(tmp), scale)
+        print(f"Generated inputs for scale={args.scale} {scale} in {time.perf_counter() - t0:.1f}s")
+        if args.only:
+            cases = [c for c in cases if c.name in args.only]
+        results = [measure(c, args.repeat) for c in cases]
+
+    record = {
+        "scale": args.scale,
+        "params": scale,
+        "created_at_utc": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": {r.name: asdict(r) for r in results},
+    }
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    (RESULTS_DIR / f"last_{args.scale}.json").write_text(json.dumps(record, indent=2), encoding="utf-8")
+
+    baseline = None
+    if baseline_path.exists():
+        baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+        if baseline.get("params") != scale:
+            print(f"Baseline {baseline_path} was recorded with other parameters; not comparing.")
+            baseline = None
+
+    print()
+    print(format_results(results, baseline))
+
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(record, indent=2), encoding="utf-8")
+        print(f"\nBaseline saved: {baseline_path}")
+        return 0
+
+    if baseline is None:
+        print(f"\nNo baseline at {baseline_path} (use --save-baseline).")
+        return 0
+
+    problems = compare_to_baseline(
+        results, baseline, time_threshold=args.time_threshold, mem_threshold=args.mem_threshold
+    )
+    if problems:
+        print("\nREGRESSIONS:")
+        for msg in problems:
+            print(f"  {msg}")
+        return 1
+    print("\nNo regressions against the baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+# etl/core/artifacts.py
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import sys
+from importlib import import_module
+from pathlib import Path
+from typing import Any, Dict, Iterable
+
+from etl.core.disk_cache import DiskCache
+
+ARTIFACT_DIR = Path("data/cache/artifacts")
+
+# bump when the stored format changes
+ARTIFACT_VERSION = 1
+
+
+def code_version(modules: Iterable[str]) -> str:
+    """
+    Hash of the source files of the given modules (dotted names).
+    Editing any of them changes the version, so artifacts built by the old code are not reused.
+    """
+    h = hashlib.sha256()
+    for name in sorted(set(modules)):
+        mod = sys.modules.get(name) or import_module(name)
+        path = getattr(mod, "__file__", None)
+        h.update(name.encode("utf-8") + b"\0")
+        if path:
+            h.update(Path(path).read_bytes())
+    return h.hexdigest()
+
+
+class ArtifactStore(DiskCache):
+    """
+    Content-addressed cache of stage outputs (data/cache/artifacts/).
+
+    - objects: pickled, keyed by stage name + a hash of the stage's inputs + code version
+    - blobs: raw files, keyed by their own sha256
+    - get() refreshes mtime; put() evicts least-recently-used entries above max_bytes
+    """
+
+    ENTRY_GLOBS = ("objects/*/*.pkl", "blobs/*/*")
+
+    def __init__(self, root: Path = ARTIFACT_DIR, *, max_bytes: int = 1024 * 1024 * 1024):
+        super().__init__(root, max_bytes=max_bytes)
+
+    @staticmethod
+    def key(stage: str, inputs: Dict[str, Any], code: str = "") -> str:
+        payload = json.dumps(
+            {"v": ARTIFACT_VERSION, "stage": stage, "inputs": inputs, "code": code},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _obj_path(self, key: str) -> Path:
+        return self.root / "objects" / key[:2] / f"{key}.pkl"
+
+    def _blob_path(self, sha256: str) -> Path:
+        return self.root / "blobs" / sha256[:2] / sha256
+
+    # ---- objects ----
+
+    def get(self, key: str, default: Any = None) -> Any:
+        p = self._obj_path(key)
+        try:
+            obj = pickle.loads(p.read_bytes())
+        except FileNotFoundError:
+            return default
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            # unreadable (e.g. written by an incompatible pandas): treat as a miss
+            p.unlink(missing_ok=True)
+            return default
+        self._touch(p)
+        return obj
+
+    def put(self, key: str, obj: Any) -> None:
+        self._write_atomic(self._obj_path(key), pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL))
+        self.evict()
+
+    # ---- blobs ----
+
+    def put_blob(self, path: Path, sha256: str) -> None:
+        """Keep a copy of a file under its content hash (no-op if already stored)."""
+        p = self._blob_path(sha256)
+        if p.exists():
+            self._touch(p)
+            return
+        p.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self._tmp_path(p)
+        shutil.copyfile(path, tmp)
+        os.replace(tmp, p)
+        self.evict()
+
+    def restore_blob(self, sha256: str, out_path: Path) -> bool:
+        """Copy the blob back to out_path. False if it is not (or no longer) stored."""
+        p = self._blob_path(sha256)
+        if not p.exists():
+            return False
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self._tmp_path(out_path)
+        shutil.copyfile(p, tmp)
+        os.replace(tmp, out_path)
+        self._touch(p)
+        return True
@@ -0,0 +1,263 @@
+# etl/core/changelog.py
+from __future__ import annotations
+
+import json
+import math
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import pandas as pd
+
+from etl.core.download import sha256_file
+from etl.core.state import SqliteDb, utc_now
+
+CHANGELOG_DB = Path("data/changelog/changelog.sqlite")
+
+# record kinds: BASE = full copy of the frame a run compared against, then the report's rows
+BASE = "BASE"
+UPDATE = "UPDATE"
+ADD_ROW = "ADD_ROW"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS changelog_runs (
+    run_id       INTEGER PRIMARY KEY AUTOINCREMENT,
+    pipeline_id  TEXT NOT NULL,
+    logged_at    TEXT NOT NULL,
+    file_sha256  TEXT,
+    data_sha256  TEXT,
+    base_sha256  TEXT,
+    out_sha256   TEXT,
+    has_base     INTEGER NOT NULL,
+    key_cols     TEXT NOT NULL,
+    fields       TEXT NOT NULL,
+    n_updates    INTEGER NOT NULL,
+    n_added      INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_clr_pipeline ON changelog_runs (pipeline_id, run_id);
+CREATE TABLE IF NOT EXISTS changes (
+    seq         INTEGER PRIMARY KEY,
+    run_id      INTEGER NOT NULL REFERENCES changelog_runs (run_id),
+    pipeline_id TEXT NOT NULL,
+    key         TEXT NOT NULL,
+    change_type TEXT NOT NULL,
+    field       TEXT NOT NULL,
+    old_value,
+    new_value
+);
+CREATE INDEX IF NOT EXISTS ix_changes_key ON changes (pipeline_id, key, field, run_id);
+CREATE INDEX IF NOT EXISTS ix_changes_run ON changes (pipeline_id, run_id);
+"""
+
+
+def _py(v: Any) -> Any:
+    """Plain Python value for SQLite / JSON (NA -> None, numpy scalars unwrapped)."""
+    if v is None or v is pd.NA or v is pd.NaT:
+        return None
+    if hasattr(v, "item"):
+        v = v.item()
+    if isinstance(v, float) and math.isnan(v):
+        return None
+    return v
+
+
+def _key_json(values: Sequence[Any]) -> str:
+    out = []
+    for v in values:
+        v = _py(v)
+        # 2019.0 and 2019 are the same key
+        if isinstance(v, float) and v.is_integer():
+            v = int(v)
+        out.append(v)
+    return json.dumps(out, ensure_ascii=False)
+
+
+def _long(df: pd.DataFrame, key_cols: List[str], fields: List[str], value_name: str) -> pd.DataFrame:
+    """One row per (key, field): key JSON, Field, value."""
+    out = df[key_cols + fields].melt(id_vars=key_cols, value_vars=fields, var_name="Field", value_name=value_name)
+    out["_key"] = [_key_json(k) for k in out[key_cols].itertuples(index=False, name=None)]
+    return out[["_key", "Field", value_name]]
+
+
+class ChangeLog(SqliteDb):
+    """
+    Append-only log of what each delivery changed (data/changelog/changelog.sqlite).
+
+    - changelog_runs: one row per logged compare (file / data / base / deliverable hashes)
+    - changes: the run's UPDATE (old -> new, per cell) and ADD_ROW (per cell of a new row)
+      records with raw values, indexed by pipeline + key + field
+    - a run that compared against something other than the previous logged deliverable
+      (the first run, or a DB edited by hand) also stores a BASE copy of that frame, so
+      db_as_of() never has to reach further back than the last BASE
+    """
+
+    SCHEMA = _SCHEMA
+
+    def __init__(self, path: Path = CHANGELOG_DB):
+        super().__init__(path)
+
+    # ---- writing ----
+
+    def log_compare(
+        self,
+        pipeline_id: str,
+        *,
+        key_cols: List[str],
+        base_df: pd.DataFrame,
+        report_df: pd.DataFrame,
+        updated_df: pd.DataFrame,
+        base_sha256: Optional[str] = None,
+        out_path: Optional[Path] = None,
+        file_sha256: Optional[str] = None,
+        data_sha256: Optional[str] = None,
+    ) -> int:
+        """
+        Append one compare_and_update_* result. Values come from base_df (old) and
+        updated_df (new) rather than the report's formatted text. Returns the run_id.
+
+        base_sha256 is the hash of the file compared against, taken before the compare ran
+        (in partition mode that file is the deliverable the compare overwrites).
+        """
+        key_cols = list(key_cols)
+        fields = [c for c in updated_df.columns if c not in key_cols]
+        base_sha = base_sha256
+        out_sha = _sha(out_path)
+
+        records: List[tuple] = []
+        new_long = _long(updated_df, key_cols, fields, "_new")
+
+        updates = report_df[report_df["ChangeType"] == UPDATE]
+        if not updates.empty:
+            u = updates[key_cols + ["Field"]].copy()
+            u["_key"] = [_key_json(k) for k in u[key_cols].itertuples(index=False, name=None)]
+            base_fields = [f for f in fields if f in base_df.columns]
+            u = u[["_key", "Field"]].merge(_long(base_df, key_cols, base_fields, "_old"), on=["_key", "Field"], how="left")
+            u = u.drop_duplicates(["_key", "Field"]).merge(new_long, on=["_key", "Field"], how="left")
+            records += [(k, UPDATE, f, _py(o), _py(n)) for k, f, o, n in u.itertuples(index=False, name=None)]
+
+        adds = report_df[report_df["ChangeType"] == ADD_ROW]
+        if not adds.empty:
+            keys = pd.DataFrame({"_key": [_key_json(k) for k in adds[key_cols].itertuples(index=False, name=None)]})
+            a = keys.merge(new_long, on="_key", how="left")
+            records += [(k, ADD_ROW, f, None, _py(n)) for k, f, n in a.itertuples(index=False, name=None)]
+
+        with self.connect() as con:
+            last = con.execute(
+                "SELECT out_sha256 FROM changelog_runs WHERE pipeline_id = ? ORDER BY run_id DESC LIMIT 1",
+                (pipeline_id,),
+            ).fetchone()
+            has_base = last is None or base_sha is None or last[0] != base_sha
+            cur = con.execute(
+                "INSERT INTO changelog_runs (pipeline_id, logged_at, file_sha256, data_sha256, base_sha256, "
+                "out_sha256, has_base, key_cols, fields, n_updates, n_added) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    pipeline_id, utc_now(), file_sha256, data_sha256, base_sha, out_sha, int(has_base),
+                    json.dumps(key_cols), json.dumps(fields), len(updates), len(adds),
+                ),
+            )
+            run_id = int(cur.lastrowid)
+            if has_base:
+                base_fields = [f for f in fields if f in base_df.columns]
+                b = _long(base_df, key_cols, base_fields, "_v")
+                con.executemany(
+                    "INSERT INTO changes (run_id, pipeline_id, key, change_type, field, old_value, new_value) "
+                    "VALUES (?, ?, ?, ?, ?, NULL, ?)",
+                    ((run_id, pipeline_id, k, BASE, f, _py(v)) for k, f, v in b.itertuples(index=False, name=None)),
+                )
+            con.executemany(
+                "INSERT INTO changes (run_id, pipeline_id, key, change_type, field, old_value, new_value) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                ((run_id, pipeline_id) + r for r in records),
+            )
+        return run_id
+
+    # ---- reading ----
+
+    def runs(self, pipeline_id: str) -> List[Dict[str, Any]]:
+        """Logged runs of a pipeline, oldest first."""
+        with self.connect(write=False) as con:
+            con.row_factory = sqlite3.Row
+            rows = con.execute(
+                "SELECT * FROM changelog_runs WHERE pipeline_id = ? ORDER BY run_id", (pipeline_id,)
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def db_as_of(self, pipeline_id: str, run_id: Optional[int] = None) -> pd.DataFrame:
+        """
+        The DB (key columns + fields) as delivered by run_id (default: the latest run):
+        the last BASE at or before it, plus every later change up to it; one query, no files.
+        """
+        with self.connect(write=False) as con:
+            if run_id is None:
+                row = con.execute(
+                    "SELECT MAX(run_id) FROM changelog_runs WHERE pipeline_id = ?", (pipeline_id,)
+                ).fetchone()
+                run_id = row[0]
+            base = con.execute(
+                "SELECT run_id, key_cols, fields FROM changelog_runs "
+                "WHERE pipeline_id = ? AND run_id <= ? AND has_base = 1 ORDER BY run_id DESC LIMIT 1",
+                (pipeline_id, run_id if run_id is not None else -1),
+            ).fetchone()
+            if base is None:
+                raise KeyError(f"No change log for {pipeline_id!r} up to run {run_id}")
+            base_run, key_cols, fields = base[0], json.loads(base[1]), json.loads(base[2])
+            # SQLite: with MAX(), the bare columns come from the row holding the maximum;
+            # seq orders the records of one run too (its BASE copy before its changes)
+            rows = con.execute(
+                "SELECT key, field, new_value, MAX(seq) FROM changes "
+                "WHERE pipeline_id = ? AND run_id BETWEEN ? AND ? GROUP BY key, field",
+                (pipeline_id, base_run, run_id),
+            ).fetchall()
+
+        if not rows:
+            return pd.DataFrame(columns=key_cols + fields)
+        long = pd.DataFrame(rows, columns=["key", "field", "value", "seq"])
+        wide = long.pivot(index="key", columns="field", values="value")
+        keys = pd.DataFrame([json.loads(k) for k in wide.index], columns=key_cols)
+        out = pd.concat([keys, wide.reset_index(drop=True)], axis=1)
+        cols = key_cols + [f for f in fields if f in out.columns] + [f for f in wide.columns if f not in fields]
+        return out[cols].sort_values(key_cols).reset_index(drop=True)
+
+    def history(self, pipeline_id: str, key: Sequence[Any], field: Optional[str] = None) -> pd.DataFrame:
+        """Every recorded change of one key (optionally one field): run, time, old -> new."""
+        sql = (
+            "SELECT c.run_id, r.logged_at, r.file_sha256, c.change_type, c.field, c.old_value, c.new_value "
+            "FROM changes c JOIN changelog_runs r ON r.run_id = c.run_id "
+            "WHERE c.pipeline_id = ? AND c.key = ? AND c.change_type != 'BASE'"
+        )
+        params: tuple = (pipeline_id, _key_json(key))
+        if field is not None:
+            sql += " AND c.field = ?"
+            params += (field,)
+        with self.connect(write=False) as con:
+            rows = con.execute(sql + " ORDER BY c.run_id, c.field", params).fetchall()
+        return pd.DataFrame(
+            rows, columns=["run_id", "logged_at", "file_sha256", "change_type", "field", "old_value", "new_value"]
+        )
+
+    def revision_counts(self, pipeline_id: str) -> pd.DataFrame:
+        """Per key: how many runs revised it (UPDATE records), most revised first."""
+        with self.connect(write=False) as con:
+            rows = con.execute(
+                "SELECT key, COUNT(DISTINCT run_id), COUNT(*) FROM changes "
+                "WHERE pipeline_id = ? AND change_type = 'UPDATE' GROUP BY key ORDER BY 2 DESC, 3 DESC",
+                (pipeline_id,),
+            ).fetchall()
+        return pd.DataFrame(
+            [(json.loads(k), runs, cells) for k, runs, cells in rows], columns=["key", "runs", "cells"]
+        )
+
+
+def _sha(path: Optional[Path]) -> Optional[str]:
+    return sha256_file(path) if path is not None and Path(path).exists() else None
+
+
+_changelog: Optional[ChangeLog] = None
+
+
+def get_changelog() -> ChangeLog:
+    """Process-wide ChangeLog on data/changelog/changelog.sqlite."""
+    global _changelog
+    if _changelog is None or _changelog.path != CHANGELOG_DB:
+        _changelog = ChangeLog(CHANGELOG_DB)
+    return _changelog
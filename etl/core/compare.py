@@ -0,0 +1,184 @@
+# etl/core/compare.py
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+REPORT_COLS_HEAD = ["ChangeType"]
+REPORT_COLS_TAIL = ["Field", "OldValue", "NewValue"]
+
+
+@dataclass
+class CompareResult:
+    rows_before: int
+    rows_after: int
+    updated_cells: int
+    new_rows: int
+    report_df: pd.DataFrame
+    updated_df: pd.DataFrame
+
+
+def _values_differ(old: pd.Series, new: pd.Series, float_tol: Optional[float]) -> pd.Series:
+    """
+    Column-wise, NA-aware inequality:
+    - both NA            -> equal
+    - exactly one NA     -> different
+    - float_tol is None  -> exact equality
+    - float_tol given    -> numeric values compared with tolerance, non-numeric ones as strings
+    """
+    old_na = old.isna().to_numpy()
+    new_na = new.isna().to_numpy()
+    both = ~old_na & ~new_na
+
+    differ = old_na != new_na
+    if not both.any():
+        return pd.Series(differ, index=old.index)
+
+    if float_tol is None:
+        o = old.to_numpy(dtype=object)
+        n = new.to_numpy(dtype=object)
+        differ[both] = o[both] != n[both]
+        return pd.Series(differ, index=old.index)
+
+    o_num = pd.to_numeric(old, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    n_num = pd.to_numeric(new, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    numeric = both & ~np.isnan(o_num) & ~np.isnan(n_num)
+    differ[numeric] = np.abs(o_num[numeric] - n_num[numeric]) > float_tol
+
+    textual = both & ~numeric
+    if textual.any():
+        o_txt = old.astype(str).to_numpy(dtype=object)
+        n_txt = new.astype(str).to_numpy(dtype=object)
+        differ[textual] = o_txt[textual] != n_txt[textual]
+
+    return pd.Series(differ, index=old.index)
+
+
+def not_older_than(df: pd.DataFrame, ref: pd.DataFrame, period_cols: List[str]) -> pd.Series:
+    """Mask of df rows whose period (period_cols, compared in order) is >= the earliest period in ref."""
+    periods = ref[period_cols].astype(int).sort_values(period_cols)
+    first = periods.iloc[0]
+    keep = pd.Series(False, index=df.index)
+    same = pd.Series(True, index=df.index)
+    for c in period_cols:
+        col = df[c].astype(int)
+        keep |= same & (col > first[c])
+        same &= col == first[c]
+    return keep | same
+
+
+def _add_row_text(df_added: pd.DataFrame, val_cols: List[str], labels: Dict[str, str]) -> pd.Series:
+    parts = [
+        labels.get(c, c) + "=" + df_added[c].astype(object).map(str)
+        for c in val_cols
+    ]
+    out = parts[0]
+    for p in parts[1:]:
+        out = out + ", " + p
+    return out
+
+
+def compare_frames(
+    df_db: pd.DataFrame,
+    df_new: pd.DataFrame,
+    key_cols: List[str],
+    val_cols: List[str],
+    *,
+    float_tol: Optional[float] = None,
+    add_row_labels: Optional[Dict[str, str]] = None,
+    value_format: Optional[Callable[[Any], Any]] = None,
+    sort_cols: Optional[List[str]] = None,
+) -> CompareResult:
+    """
+    Vectorized keyed diff/merge of an extracted frame into the DB frame.
+
+    - rows are aligned on key_cols; for every val_col a boolean mask marks changed cells
+      (see _values_differ for the NA/tolerance rules)
+    - changed cells take the new value; keys only in df_new are appended
+    - report_df has one UPDATE row per changed cell and one ADD_ROW row per new key:
+      ChangeType, <key_cols>, Field, OldValue, NewValue
+
+    Inputs are expected to be normalized already (types, stripped strings, filtered periods).
+    value_format is applied to OldValue/NewValue of UPDATE rows (e.g. int / "" for NA),
+    add_row_labels renames columns in the ADD_ROW summary text.
+    """
+    labels = add_row_labels or {}
+    sort_cols = sort_cols or list(key_cols)
+
+    db_idx = df_db.set_index(key_cols)
+    new_idx = df_new.set_index(key_cols)
+    new_idx = new_idx[~new_idx.index.duplicated(keep="last")]
+
+    common = db_idx.index.intersection(new_idx.index, sort=False)
+    only_new = new_idx.index.difference(db_idx.index)
+
+    old_vals = db_idx.loc[common, val_cols]
+    old_vals = old_vals[~old_vals.index.duplicated(keep="first")]
+    new_vals = new_idx.loc[common, val_cols]
+
+    key_frame = common.to_frame(index=False)
+    update_parts: List[pd.DataFrame] = []
+    updated_cells = 0
+
+    for col_pos, c in enumerate(val_cols):
+        mask = _values_differ(old_vals[c], new_vals[c], float_tol).to_numpy()
+        n_changed = int(mask.sum())
+        if not n_changed:
+            continue
+        updated_cells += n_changed
+
+        changed_keys = common[mask]
+        old_c = old_vals[c].to_numpy(dtype=object)[mask]
+        new_c = new_vals[c].to_numpy(dtype=object)[mask]
+        if value_format is not None:
+            old_c = [value_format(v) for v in old_c]
+            new_c = [value_format(v) for v in new_c]
+
+        part = key_frame.loc[mask].reset_index(drop=True)
+        part.insert(0, "ChangeType", "UPDATE")
+        part["Field"] = c
+        # object dtype: concatenating int and float columns must not turn 100 into "100.0"
+        part["OldValue"] = pd.Series(list(old_c), dtype=object)
+        part["NewValue"] = pd.Series(list(new_c), dtype=object)
+        part["_key_pos"] = np.flatnonzero(mask)
+        part["_col_pos"] = col_pos
+        update_parts.append(part)
+
+        db_idx.loc[changed_keys, c] = new_vals[c].to_numpy()[mask]
+
+    df_added = new_idx.loc[only_new].reset_index()
+
+    report_cols = REPORT_COLS_HEAD + list(key_cols) + REPORT_COLS_TAIL
+    report_parts: List[pd.DataFrame] = []
+    if update_parts:
+        updates = pd.concat(update_parts, ignore_index=True)
+        updates = updates.sort_values(["_key_pos", "_col_pos"], kind="stable")
+        report_parts.append(updates[report_cols])
+    if not df_added.empty:
+        adds = df_added[list(key_cols)].copy()
+        adds.insert(0, "ChangeType", "ADD_ROW")
+        adds["Field"] = ""
+        adds["OldValue"] = pd.Series("", index=adds.index, dtype=object)
+        adds["NewValue"] = _add_row_text(df_added, val_cols, labels).astype(object)
+        report_parts.append(adds[report_cols])
+
+    if report_parts:
+        report_df = pd.concat(report_parts, ignore_index=True)
+    else:
+        report_df = pd.DataFrame(columns=report_cols)
+
+    df_updated = pd.concat([db_idx.reset_index(), df_added], ignore_index=True)
+    df_updated = df_updated.sort_values(sort_cols).reset_index(drop=True)
+
+    return CompareResult(
+        rows_before=len(df_db),
+        rows_after=len(df_updated),
+        updated_cells=updated_cells,
+        new_rows=len(df_added),
+        report_df=report_df,
+        updated_df=df_updated,
+    )
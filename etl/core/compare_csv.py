@@ -3,13 +3,22 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import List, Optional, Sequence
 
 import pandas as pd
 
+from etl.core.compare import compare_frames, not_older_than
+from etl.core.db_snapshot import DbSnapshotCache
+from etl.core.metrics import NULL_METRICS, RunMetrics
+from etl.core.normalize import to_numeric
+
 
 KEY_COLS = ["Year", "Month"]
 VAL_COLS = ["Permits Number", "Area", "Volume"]
+PERIOD_COLS = ["Year", "Month"]  # key columns that order the periods (prevent_older_than_db)
+
+# labels used in the ADD_ROW summary text of the report
+ADD_ROW_LABELS = {"Permits Number": "Permits"}
 
 
 @dataclass
@@ -20,6 +29,7 @@ class CsvUpdateResult:
     new_rows: int
     report_df: pd.DataFrame
     updated_df: pd.DataFrame
+    base_df: Optional[pd.DataFrame] = None  # the normalized DB frame that was compared against
 
 
 def _clean_cols(df: pd.DataFrame) -> pd.DataFrame:
@@ -28,23 +38,24 @@ def _clean_cols(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def _to_num(x):
-    if pd.isna(x):
-        return pd.NA
-    s = str(x).strip()
-    if s == "" or s in ("…", "...", "—"):
-        return pd.NA
-    # remove thousands separators
-    s = s.replace(",", "")
-    try:
-        # permits/area/volume are integers
-        return int(float(s))
-    except Exception:
-        return pd.NA
+def _report_int(v):
+    return "" if pd.isna(v) else int(v)
 
 
-def _period_num(df: pd.DataFrame) -> pd.Series:
-    return df["Year"].astype(int) * 100 + df["Month"].astype(int)
+def _normalize(
+    df: pd.DataFrame, key_cols: List[str], val_cols: List[str], strip_cols: Sequence[str] = ()
+) -> pd.DataFrame:
+    df = _clean_cols(df)
+    # normalize types: text keys are stripped, the other keys are integers
+    for c in strip_cols:
+        df[c] = df[c].astype(str).str.strip()
+    for c in key_cols:
+        if c not in strip_cols:
+            df[c] = pd.to_numeric(df[c], errors="coerce").astype("Int64")
+    # permits/area/volume are integers
+    for c in val_cols:
+        df[c] = to_numeric(df[c], as_int=True)
+    return df.dropna(subset=key_cols).copy()
 
 
 def compare_and_update_csv(
@@ -54,87 +65,77 @@ def compare_and_update_csv(
     report_csv_path: Path,
     *,
     prevent_older_than_db: bool = True,
+    key_cols: Optional[List[str]] = None,
+    val_cols: Optional[List[str]] = None,
+    period_cols: Optional[List[str]] = None,
+    strip_cols: Sequence[str] = (),
+    metrics: Optional[RunMetrics] = None,
+    db_cache: Optional[DbSnapshotCache] = None,
+    cache_db: bool = True,
 ) -> CsvUpdateResult:
+    """
+    period_cols (default PERIOD_COLS) order the periods for prevent_older_than_db;
+    strip_cols are text key columns (whitespace-stripped, not cast to integers).
+
+    The normalized DB frame comes from the DbSnapshotCache (default location unless
+    db_cache is passed) while the DB file is unchanged; cache_db=False always parses.
+    """
+    key_cols = key_cols or KEY_COLS
+    val_cols = val_cols or VAL_COLS
+    period_cols = period_cols or PERIOD_COLS
+    strip_cols = list(strip_cols)
+    metrics = metrics or NULL_METRICS
+
     if not isinstance(db_csv_path, Path):
         db_csv_path = Path(db_csv_path)
 
     if not db_csv_path.exists():
         raise FileNotFoundError(f"DB CSV not found: {db_csv_path}")
 
-    df_db = pd.read_csv(db_csv_path)
-    df_db = _clean_cols(df_db)
-
-    df_new = extracted_df.copy()
-    df_new = _clean_cols(df_new)
-
-    # normalize types
-    for c in ["Year", "Month"]:
-        df_db[c] = pd.to_numeric(df_db[c], errors="coerce").astype("Int64")
-        df_new[c] = pd.to_numeric(df_new[c], errors="coerce").astype("Int64")
-
-    for c in VAL_COLS:
-        df_db[c] = df_db[c].map(_to_num).astype("Int64")
-        df_new[c] = df_new[c].map(_to_num).astype("Int64")
-
-    df_db = df_db.dropna(subset=KEY_COLS).copy()
-    df_new = df_new.dropna(subset=KEY_COLS).copy()
-
-    if prevent_older_than_db and not df_db.empty:
-        min_period = int(_period_num(df_db).min())
-        df_new = df_new[_period_num(df_new) >= min_period].copy()
-
-    db_idx = df_db.set_index(KEY_COLS)
-    new_idx = df_new.set_index(KEY_COLS)
-
-    common = db_idx.index.intersection(new_idx.index)
-    only_new = new_idx.index.difference(db_idx.index)
-
-    changes: List[Dict[str, Any]] = []
-    updated_cells = 0
-
-    for k in common:
-        for c in VAL_COLS:
-            old = db_idx.loc[k, c]
-            new = new_idx.loc[k, c]
-            if pd.isna(old) and pd.isna(new):
-                continue
-            if (pd.isna(old) != pd.isna(new)) or (old != new):
-                updated_cells += 1
-                changes.append({
-                    "ChangeType": "UPDATE",
-                    "Year": int(k[0]),
-                    "Month": int(k[1]),
-                    "Field": c,
-                    "OldValue": "" if pd.isna(old) else int(old),
-                    "NewValue": "" if pd.isna(new) else int(new),
-                })
-                db_idx.loc[k, c] = new
-
-    df_added = new_idx.loc[only_new].reset_index()
-    for _, r in df_added.iterrows():
-        changes.append({
-            "ChangeType": "ADD_ROW",
-            "Year": int(r["Year"]),
-            "Month": int(r["Month"]),
-            "Field": "",
-            "OldValue": "",
-            "NewValue": f'Permits={r["Permits Number"]}, Area={r["Area"]}, Volume={r["Volume"]}',
-        })
-
-    df_updated = pd.concat([db_idx.reset_index(), df_added], ignore_index=True)
-    df_updated = df_updated.sort_values(["Year", "Month"]).reset_index(drop=True)
-
-    out_csv_path.parent.mkdir(parents=True, exist_ok=True)
-    report_csv_path.parent.mkdir(parents=True, exist_ok=True)
-
-    df_updated.to_csv(out_csv_path, index=False)
-    pd.DataFrame(changes).to_csv(report_csv_path, index=False)
+    def read_db() -> pd.DataFrame:
+        return _normalize(pd.read_csv(db_csv_path), key_cols, val_cols, strip_cols)
+
+    with metrics.stage("read_db") as span:
+        if cache_db:
+            df_db, span.cached = (db_cache or DbSnapshotCache()).load(
+                db_csv_path,
+                read_db,
+                params={"reader": "csv", "key_cols": key_cols, "val_cols": val_cols, "strip_cols": strip_cols},
+                code=("etl.core.compare_csv", "etl.core.normalize"),
+            )
+        else:
+            df_db = read_db()
+        span.rows_out = len(df_db)
+
+    with metrics.stage("compare", rows_in=len(extracted_df)) as span:
+        df_new = _normalize(extracted_df, key_cols, val_cols, strip_cols)
+
+        if prevent_older_than_db and not df_db.empty:
+            df_new = df_new[not_older_than(df_new, df_db, period_cols)].copy()
+
+        cmp = compare_frames(
+            df_db,
+            df_new,
+            key_cols,
+            val_cols,
+            add_row_labels=ADD_ROW_LABELS,
+            value_format=_report_int,
+        )
+        span.rows_out = cmp.rows_after
+
+    with metrics.stage("write", rows_in=cmp.rows_after):
+        out_csv_path.parent.mkdir(parents=True, exist_ok=True)
+        report_csv_path.parent.mkdir(parents=True, exist_ok=True)
+
+        cmp.updated_df.to_csv(out_csv_path, index=False)
+        cmp.report_df.to_csv(report_csv_path, index=False)
 
     return CsvUpdateResult(
-        rows_before=len(df_db),
-        rows_after=len(df_updated),
-        updated_cells=updated_cells,
-        new_rows=len(df_added),
-        report_df=pd.DataFrame(changes),
-        updated_df=df_updated,
+        rows_before=cmp.rows_before,
+        rows_after=cmp.rows_after,
+        updated_cells=cmp.updated_cells,
+        new_rows=cmp.new_rows,
+        report_df=cmp.report_df,
+        updated_df=cmp.updated_df,
+        base_df=df_db,
     )
@@ -0,0 +1,99 @@
+# etl/core/compare_db.py
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+import pandas as pd
+
+from etl.core.compare import compare_frames
+from etl.core.metrics import NULL_METRICS, RunMetrics
+from etl.core.storage import SqliteStore
+
+
+@dataclass
+class DbUpdateResult:
+    rows_before: int
+    rows_after: int
+    updated_cells: int
+    new_rows: int
+    rows_written: int
+    report_df: pd.DataFrame
+    updated_df: pd.DataFrame
+
+
+def compare_and_update_db(
+    store: SqliteStore,
+    table: str,
+    extracted_df: pd.DataFrame,
+    report_csv_path: Path,
+    *,
+    key_cols: List[str],
+    val_cols: List[str],
+    period_cols: Optional[List[str]] = None,
+    prevent_older_than_db: bool = True,
+    float_tol: Optional[float] = None,
+    metrics: Optional[RunMetrics] = None,
+) -> DbUpdateResult:
+    """
+    Same contract as compare_and_update_csv/excel, but the DB is a keyed table in a store:
+    - reads only the DB periods covered by extracted_df (period_cols, default key_cols[:2])
+    - diffs with the shared compare engine
+    - upserts only changed + new rows (no full rewrite)
+
+    Deliverables are produced separately with store.export_csv / store.export_excel.
+    updated_df covers the compared period range only, not the whole table.
+    """
+    period_cols = period_cols or key_cols[:2]
+    metrics = metrics or NULL_METRICS
+    df_new = extracted_df.copy()
+
+    with metrics.stage("read_db") as span:
+        if not store.has_table(table):
+            # first load: everything is new
+            df_db = df_new.iloc[0:0].copy()
+        else:
+            if prevent_older_than_db:
+                first = store.first_period(table, period_cols)
+                if first is not None:
+                    keep = pd.Series(list(zip(*(df_new[c] for c in period_cols))), index=df_new.index) >= first
+                    df_new = df_new[keep.to_numpy()].copy()
+
+            if df_new.empty:
+                df_db = df_new.copy()
+            else:
+                periods = df_new.sort_values(period_cols)[period_cols]
+                lo, hi = periods.iloc[0], periods.iloc[-1]
+                df_db = store.read(
+                    table,
+                    period_cols=period_cols,
+                    start=tuple(lo.tolist()),
+                    end=tuple(hi.tolist()),
+                )
+        span.rows_out = len(df_db)
+
+    with metrics.stage("compare", rows_in=len(extracted_df)) as span:
+        cmp = compare_frames(df_db, df_new, key_cols, val_cols, float_tol=float_tol)
+        span.rows_out = cmp.rows_after
+
+    with metrics.stage("write", rows_in=len(cmp.report_df)) as span:
+        # write back only the rows that changed or are new
+        touched = cmp.report_df[key_cols].drop_duplicates()
+        to_write = cmp.updated_df.merge(touched, on=key_cols, how="inner")
+        written = store.upsert(table, to_write, key_cols)
+        span.rows_out = written
+
+        report_csv_path = Path(report_csv_path)
+        report_csv_path.parent.mkdir(parents=True, exist_ok=True)
+        cmp.report_df.to_csv(report_csv_path, index=False)
+
+    return DbUpdateResult(
+        rows_before=cmp.rows_before,
+        rows_after=cmp.rows_after,
+        updated_cells=cmp.updated_cells,
+        new_rows=cmp.new_rows,
+        rows_written=written,
+        report_df=cmp.report_df,
+        updated_df=cmp.updated_df,
+    )
@@ -2,14 +2,25 @@
 
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Optional
 
 import pandas as pd
 import openpyxl
 from openpyxl.utils.dataframe import dataframe_to_rows
 
+from etl.core.compare import compare_frames, not_older_than
+from etl.core.db_snapshot import DbSnapshotCache
+from etl.core.excel_reader import read_sheet
+from etl.core.excel_writer import patch_sheet, write_new_workbook
+from etl.core.metrics import NULL_METRICS, RunMetrics
+
 KEY_COLS = ["Year", "Quarter", "Region"]
 VAL_COLS = ["Index", "Up To 5 Years Old Index", "Over 5 Years Old Index"]
+PERIOD_COLS = ["Year", "Quarter"]  # key columns that order the periods (prevent_older_than_db)
+STRIP_COLS = ["Region"]            # text key columns, whitespace-stripped on both sides
+
+# labels used in the ADD_ROW summary text of the report
+ADD_ROW_LABELS = {"Up To 5 Years Old Index": "UpTo5", "Over 5 Years Old Index": "Over5"}
 
 @dataclass
 class ExcelUpdateResult:
@@ -19,9 +30,7 @@ class ExcelUpdateResult:
     new_rows: int
     report_df: pd.DataFrame
     updated_df: pd.DataFrame
-
-def _period_num(df: pd.DataFrame) -> pd.Series:
-    return df["Year"].astype(int) * 10 + df["Quarter"].astype(int)
+    base_df: Optional[pd.DataFrame] = None  # the DB frame that was compared against
 
 def compare_and_update_excel(
     db_excel_path: Path,
@@ -31,95 +40,118 @@ def compare_and_update_excel(
     report_csv_path: Path,
     *,
     prevent_older_than_db: bool = True,
-    float_tol: float = 1e-9
+    float_tol: float = 1e-9,
+    key_cols: Optional[List[str]] = None,
+    val_cols: Optional[List[str]] = None,
+    period_cols: Optional[List[str]] = None,
+    strip_cols: Optional[List[str]] = None,
+    write_mode: str = "incremental",
+    metrics: Optional[RunMetrics] = None,
+    db_cache: Optional[DbSnapshotCache] = None,
+    cache_db: bool = True,
 ) -> ExcelUpdateResult:
+    """
+    write_mode:
+    - "incremental": load the DB workbook, patch only changed cells, insert new rows in
+      key order (keeps formatting/other sheets; same row order as "rewrite" for a sorted sheet)
+    - "rewrite": load the DB workbook and rewrite the whole sheet, sorted (old behaviour)
+    - "fresh": build a new single-sheet workbook from scratch (write-only, fastest)
+
+    period_cols (default PERIOD_COLS) order the periods for prevent_older_than_db;
+    strip_cols (default STRIP_COLS) are text key columns stripped before matching.
+
+    The DB frame comes from the DbSnapshotCache (default location unless db_cache is
+    passed) while the workbook is unchanged; cache_db=False always parses it. The
+    "incremental" / "rewrite" writers still open the workbook with openpyxl, since they
+    patch it in place to keep formatting.
+    """
+    if write_mode not in ("incremental", "rewrite", "fresh"):
+        raise ValueError(f"Unknown write_mode: {write_mode}")
+
+    key_cols = key_cols or KEY_COLS
+    val_cols = val_cols or VAL_COLS
+    period_cols = period_cols or PERIOD_COLS
+    strip_cols = STRIP_COLS if strip_cols is None else list(strip_cols)
+    metrics = metrics or NULL_METRICS
+
     if not isinstance(db_excel_path, Path):
         db_excel_path = Path(db_excel_path)
 
     if not db_excel_path.exists():
         raise FileNotFoundError(f"DB Excel not found: {db_excel_path}")
 
-    df_db = pd.read_excel(db_excel_path, sheet_name=sheet)
-    if df_db.empty:
-        raise ValueError("DB Excel sheet is empty.")
-
-    df_db["Region"] = df_db["Region"].astype(str).str.strip()
-    df_new = extracted_df.copy()
-    df_new["Region"] = df_new["Region"].astype(str).str.strip()
-
-    if prevent_older_than_db:
-        min_period = int(_period_num(df_db).min())
-        df_new = df_new[_period_num(df_new) >= min_period].copy()
-
-    db_idx = df_db.set_index(KEY_COLS)
-    new_idx = df_new.set_index(KEY_COLS)
-
-    common = db_idx.index.intersection(new_idx.index)
-    only_new = new_idx.index.difference(db_idx.index)
-
-    changes: List[Dict[str, Any]] = []
-    updated_cells = 0
-
-    for k in common:
-        for c in VAL_COLS:
-            old = db_idx.loc[k, c]
-            new = new_idx.loc[k, c]
-
-            if pd.isna(old) and pd.isna(new):
-                continue
-
-            different = False
-            try:
-                different = (pd.isna(old) != pd.isna(new)) or abs(float(old) - float(new)) > float_tol
-            except Exception:
-                different = str(old) != str(new)
-
-            if different:
-                updated_cells += 1
-                changes.append({
-                    "ChangeType": "UPDATE",
-                    "Year": k[0], "Quarter": k[1], "Region": k[2],
-                    "Field": c,
-                    "OldValue": old,
-                    "NewValue": new
-                })
-                db_idx.loc[k, c] = new
-
-    df_added = new_idx.loc[only_new].reset_index()
-    for _, r in df_added.iterrows():
-        changes.append({
-            "ChangeType": "ADD_ROW",
-            "Year": r["Year"], "Quarter": r["Quarter"], "Region": r["Region"],
-            "Field": "",
-            "OldValue": "",
-            "NewValue": f'Index={r["Index"]}, UpTo5={r["Up To 5 Years Old Index"]}, Over5={r["Over 5 Years Old Index"]}'
-        })
-
-    df_updated = pd.concat([db_idx.reset_index(), df_added], ignore_index=True)
-    df_updated = df_updated.sort_values(["Year", "Quarter", "Region"]).reset_index(drop=True)
-
-    report_df = pd.DataFrame(changes)
-    report_csv_path.parent.mkdir(parents=True, exist_ok=True)
-    report_df.to_csv(report_csv_path, index=False)
-
-    out_excel_path.parent.mkdir(parents=True, exist_ok=True)
-    wb = openpyxl.load_workbook(db_excel_path)
-    if sheet not in wb.sheetnames:
-        raise ValueError(f"Sheet '{sheet}' not found. Available: {wb.sheetnames}")
-
-    ws = wb[sheet]
-    ws.delete_rows(1, ws.max_row)
-
-    for r in dataframe_to_rows(df_updated, index=False, header=True):
-        ws.append(r)
-
-    wb.save(out_excel_path)
+    # streamed read; the incremental writer only needs the key/value columns
+    columns = key_cols + val_cols if write_mode == "incremental" else None
+
+    def read_db() -> pd.DataFrame:
+        df = read_sheet(db_excel_path, sheet=sheet, header=0, columns=columns)
+        if not df.empty:
+            for c in strip_cols:
+                df[c] = df[c].astype(str).str.strip()
+        return df
+
+    with metrics.stage("read_db") as span:
+        if cache_db:
+            df_db, span.cached = (db_cache or DbSnapshotCache()).load(
+                db_excel_path,
+                read_db,
+                params={"reader": "excel", "sheet": sheet, "columns": columns, "strip_cols": strip_cols},
+                code=("etl.core.compare_excel", "etl.core.excel_reader"),
+            )
+        else:
+            df_db = read_db()
+        if df_db.empty:
+            raise ValueError("DB Excel sheet is empty.")
+        span.rows_out = len(df_db)
+
+    with metrics.stage("compare", rows_in=len(extracted_df)) as span:
+        df_new = extracted_df.copy()
+        for c in strip_cols:
+            df_new[c] = df_new[c].astype(str).str.strip()
+
+        if prevent_older_than_db:
+            df_new = df_new[not_older_than(df_new, df_db, period_cols)].copy()
+
+        cmp = compare_frames(
+            df_db,
+            df_new,
+            key_cols,
+            val_cols,
+            float_tol=float_tol,
+            add_row_labels=ADD_ROW_LABELS,
+        )
+        report_df = cmp.report_df
+        df_updated = cmp.updated_df
+
+        report_csv_path.parent.mkdir(parents=True, exist_ok=True)
+        report_df.to_csv(report_csv_path, index=False)
+        span.rows_out = cmp.rows_after
+
+    with metrics.stage("write", rows_in=cmp.rows_after):
+        out_excel_path.parent.mkdir(parents=True, exist_ok=True)
+        if write_mode == "fresh":
+            write_new_workbook(df_updated, out_excel_path, sheet=sheet)
+        else:
+            wb = openpyxl.load_workbook(db_excel_path)
+            if sheet not in wb.sheetnames:
+                raise ValueError(f"Sheet '{sheet}' not found. Available: {wb.sheetnames}")
+
+            ws = wb[sheet]
+            if write_mode == "incremental":
+                patch_sheet(ws, df_updated, report_df, key_cols)
+            else:
+                ws.delete_rows(1, ws.max_row)
+                for r in dataframe_to_rows(df_updated, index=False, header=True):
+                    ws.append(r)
+
+            wb.save(out_excel_path)
 
     return ExcelUpdateResult(
-        rows_before=len(df_db),
-        rows_after=len(df_updated),
-        updated_cells=updated_cells,
-        new_rows=len(df_added),
+        rows_before=cmp.rows_before,
+        rows_after=cmp.rows_after,
+        updated_cells=cmp.updated_cells,
+        new_rows=cmp.new_rows,
         report_df=report_df,
         updated_df=df_updated,
+        base_df=df_db,
     )
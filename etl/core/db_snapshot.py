@@ -0,0 +1,142 @@
+# etl/core/db_snapshot.py
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pickle
+from importlib.util import find_spec
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from etl.core.artifacts import code_version
+from etl.core.disk_cache import DiskCache
+from etl.core.download import sha256_file
+from etl.core.fingerprint import file_signature
+
+SNAPSHOT_DIR = Path("data/cache/db_snapshots")
+
+# bump when the stored format changes
+SNAPSHOT_VERSION = 1
+
+# Arrow IPC (Feather, uncompressed) can be memory-mapped; without pyarrow, pickle
+HAS_ARROW = find_spec("pyarrow") is not None
+
+
+class DbSnapshotCache(DiskCache):
+    """
+    Parsed + normalized DB frames (data/cache/db_snapshots/), so a delivery does not
+    re-parse the DB Excel / CSV when the file has not changed.
+
+    - key: sha256 of the DB file + the read parameters + the source of the modules that
+      build the frame; editing the DB file (or that code) is a miss, nothing to invalidate
+    - the sha256 is re-computed only when the file's size / mtime changed
+      (meta/<path hash>.json remembers the last signature -> sha256)
+    - snapshots are Feather files read through a memory map when pyarrow is installed,
+      pickles otherwise (and for frames Arrow cannot convert, e.g. mixed-type object
+      columns); a hit refreshes mtime, put() evicts LRU entries above max_bytes
+    """
+
+    ENTRY_GLOBS = ("snap/*/*",)  # meta/ files are tiny and not evicted
+
+    def __init__(self, root: Path = SNAPSHOT_DIR, *, max_bytes: int = 512 * 1024 * 1024):
+        super().__init__(root, max_bytes=max_bytes)
+        self.ext = ".feather" if HAS_ARROW else ".pkl"
+
+    # ---- keys ----
+
+    def _meta_path(self, path: Path) -> Path:
+        name = hashlib.sha256(str(Path(path).resolve()).encode("utf-8")).hexdigest()
+        return self.root / "meta" / f"{name}.json"
+
+    def file_sha256(self, path: Path) -> str:
+        """sha256 of the file, re-hashed only when its size / mtime changed."""
+        sig = file_signature(path)
+        meta_path = self._meta_path(path)
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            if meta.get("signature") == sig:
+                return meta["sha256"]
+        except (FileNotFoundError, ValueError, KeyError):
+            pass
+        sha = sha256_file(path)
+        self._write_atomic(meta_path, json.dumps({"path": str(path), "signature": sig, "sha256": sha}).encode("utf-8"))
+        return sha
+
+    def key(self, path: Path, params: Dict[str, Any], code: Sequence[str] = ()) -> str:
+        payload = json.dumps(
+            {
+                "v": SNAPSHOT_VERSION,
+                "file": self.file_sha256(path),
+                "params": params,
+                "code": code_version(code),
+                "pandas": pd.__version__,
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _snap_path(self, key: str, ext: Optional[str] = None) -> Path:
+        return self.root / "snap" / key[:2] / f"{key}{ext or self.ext}"
+
+    # ---- io ----
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        # a Feather snapshot, or the pickle put() fell back to
+        for p in dict.fromkeys([self._snap_path(key), self._snap_path(key, ".pkl")]):
+            if not p.exists():
+                continue
+            try:
+                if p.suffix == ".feather":
+                    from pyarrow import feather
+
+                    df = feather.read_table(p, memory_map=True).to_pandas()
+                else:
+                    df = pickle.loads(p.read_bytes())
+            except Exception:
+                # unreadable (truncated, written by an incompatible version): treat as a miss
+                p.unlink(missing_ok=True)
+                continue
+            self._touch(p)
+            return df
+        return None
+
+    def put(self, key: str, df: pd.DataFrame) -> None:
+        p = self._snap_path(key)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self._tmp_path(p)
+        if HAS_ARROW:
+            from pyarrow import ArrowException
+
+            try:
+                # Feather needs a default index; uncompressed so it can be memory-mapped
+                df.reset_index(drop=True).to_feather(tmp, compression="uncompressed")
+            except ArrowException:
+                # e.g. an object column mixing numbers and text: store a pickle instead
+                tmp.unlink(missing_ok=True)
+                p = self._snap_path(key, ".pkl")
+                tmp = self._tmp_path(p)
+        if p.suffix == ".pkl":
+            tmp.write_bytes(pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL))
+        os.replace(tmp, p)
+        self.evict()
+
+    def load(
+        self,
+        path: Path,
+        build: Callable[[], pd.DataFrame],
+        *,
+        params: Dict[str, Any],
+        code: Sequence[str] = (),
+    ) -> Tuple[pd.DataFrame, bool]:
+        """(frame, cached): the snapshot for path + params, or build() and store it."""
+        key = self.key(path, params, code)
+        df = self.get(key)
+        if df is not None:
+            return df, True
+        df = build()
+        self.put(key, df)
+        return df, False
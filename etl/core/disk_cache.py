@@ -0,0 +1,71 @@
+# etl/core/disk_cache.py
+from __future__ import annotations
+
+import os
+import shutil
+from pathlib import Path
+from typing import Tuple
+
+
+class DiskCache:
+    """
+    Size-bounded LRU directory shared by the on-disk caches (artifacts, PDF tables, DB snapshots).
+
+    - entries are the files under root matching ENTRY_GLOBS; recency is their mtime
+    - writes go to a per-process temp file and are renamed into place (readers never see
+      a partial entry)
+    - touch() on a hit; evict() deletes least-recently-used entries until the total size
+      is <= max_bytes
+    """
+
+    ENTRY_GLOBS: Tuple[str, ...] = ("*/*",)
+
+    def __init__(self, root: Path, *, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def _tmp_path(p: Path) -> Path:
+        return p.with_name(p.name + f".{os.getpid()}.tmp")
+
+    @staticmethod
+    def _touch(p: Path) -> None:
+        try:
+            os.utime(p)  # LRU: mark as recently used
+        except OSError:
+            pass
+
+    def _write_atomic(self, p: Path, data: bytes) -> None:
+        p.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self._tmp_path(p)
+        tmp.write_bytes(data)
+        os.replace(tmp, p)
+
+    def evict(self) -> int:
+        """Delete least-recently-used entries until total size <= max_bytes. Returns files removed."""
+        if not self.root.exists():
+            return 0
+        entries = []
+        total = 0
+        for pattern in self.ENTRY_GLOBS:
+            for p in self.root.glob(pattern):
+                if p.name.endswith(".tmp"):
+                    continue
+                try:
+                    st = p.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, p))
+                total += st.st_size
+
+        removed = 0
+        for _, size, p in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            p.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self) -> None:
+        shutil.rmtree(self.root, ignore_errors=True)
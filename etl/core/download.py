@@ -1,9 +1,25 @@
 ﻿import datetime
+import email.utils
 import hashlib
+import json
+import os
+import random
+import threading
+import time
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterable, List, Optional, Tuple, Union
+from urllib.parse import urlparse
 
 import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0",
+    "Accept": "*/*",
+}
+
+# statuses worth retrying (throttling / transient upstream errors)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
 
 
 def sha256_file(path: Path) -> str:
@@ -14,41 +30,396 @@ def sha256_file(path: Path) -> str:
     return h.hexdigest()
 
 
+class DownloadClient:
+    """
+    Shared HTTP client for all pipelines:
+    - one requests.Session with a connection pool per host (keep-alive, TLS session reuse)
+    - per-host rate limit: at least `min_interval_s` between request starts to the same host
+    - retries on connection errors / RETRY_STATUSES with exponential backoff + jitter
+      (Retry-After is honoured when the server sends it)
+
+    Thread-safe for the way we use it (concurrent GET/HEAD from the runner's worker threads).
+    """
+
+    def __init__(
+        self,
+        *,
+        pool_maxsize: int = 10,
+        min_interval_s: float = 0.5,
+        host_intervals: Optional[Dict[str, float]] = None,
+        max_retries: int = 3,
+        backoff_base_s: float = 1.0,
+        backoff_max_s: float = 30.0,
+        headers: Optional[dict] = None,
+    ):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=pool_maxsize)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update(headers or DEFAULT_HEADERS)
+
+        self.min_interval_s = min_interval_s
+        self.host_intervals = dict(host_intervals or {})
+        self.max_retries = max_retries
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+
+        self._next_slot: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _wait_turn(self, url: str) -> None:
+        host = urlparse(url).netloc.lower()
+        interval = self.host_intervals.get(host, self.min_interval_s)
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, 0.0))
+            self._next_slot[host] = slot + interval
+        if slot > now:
+            time.sleep(slot - now)
+
+    def backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """
+        Seconds to wait before retry number `attempt` (0-based): the server's Retry-After
+        (seconds or HTTP date) when it sends a usable one, exponential backoff + jitter otherwise.
+        """
+        if retry_after:
+            try:
+                return min(max(float(retry_after), 0.0), self.backoff_max_s)
+            except ValueError:
+                pass
+            try:
+                dt = email.utils.parsedate_to_datetime(retry_after)
+            except (TypeError, ValueError):
+                dt = None  # unparsable ("soon"): ignore the header
+            if dt is not None:
+                if dt.tzinfo is None:
+                    dt = dt.replace(tzinfo=datetime.timezone.utc)
+                return min(max(dt.timestamp() - time.time(), 0.0), self.backoff_max_s)
+        cap = min(self.backoff_max_s, self.backoff_base_s * (2 ** attempt))
+        # "equal jitter": half fixed, half random, so a burst of pipelines does not retry in lockstep
+        return cap / 2 + random.uniform(0, cap / 2)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("allow_redirects", True)
+        attempt = 0
+        while True:
+            self._wait_turn(url)
+            try:
+                r = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.max_retries:
+                    raise
+                time.sleep(self.backoff(attempt))
+                attempt += 1
+                continue
+
+            if r.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                delay = self.backoff(attempt, r.headers.get("Retry-After"))
+                r.close()
+                time.sleep(delay)
+                attempt += 1
+                continue
+            return r
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def head(self, url: str, **kwargs) -> requests.Response:
+        return self.request("HEAD", url, **kwargs)
+
+    def close(self) -> None:
+        self.session.close()
+
+
+_client: Optional[DownloadClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> DownloadClient:
+    """Process-wide shared DownloadClient (created on first use)."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = DownloadClient()
+        return _client
+
+
+def _utc_now() -> str:
+    return datetime.datetime.utcnow().replace(microsecond=0).isoformat() + "Z"
+
+
+def conditional_headers(etag: Optional[str] = None, last_modified: Optional[str] = None) -> Dict[str, str]:
+    """Validator headers for a conditional GET/HEAD (empty if we know nothing)."""
+    h: Dict[str, str] = {}
+    if etag:
+        h["If-None-Match"] = etag
+    if last_modified:
+        h["If-Modified-Since"] = last_modified
+    return h
+
+
+class IncompleteDownload(IOError):
+    """The body ended before Content-Length bytes arrived (the .part file is kept for a resume)."""
+
+
+class _Restart(Exception):
+    """The .part file does not fit the server's current file: it was dropped, fetch from byte 0."""
+
+
+# transfer failures worth resuming from the .part file
+_TRANSFER_ERRORS = (
+    requests.ConnectionError,
+    requests.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+    IncompleteDownload,
+)
+
+
+def _part_paths(out_path: Path) -> Tuple[Path, Path]:
+    # "<name>.part" holds the bytes, "<name>.part.json" the validators of the response they came from
+    return out_path.with_name(out_path.name + ".part"), out_path.with_name(out_path.name + ".part.json")
+
+
+def _discard_part(out_path: Path) -> None:
+    for p in _part_paths(out_path):
+        p.unlink(missing_ok=True)
+
+
+def _if_range(info: Dict[str, Any]) -> Optional[str]:
+    """Validator for If-Range: a strong ETag, else Last-Modified (weak ETags are not allowed)."""
+    etag = info.get("etag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return info.get("last_modified")
+
+
+def _resume_point(url: str, out_path: Path) -> Tuple[int, Optional[Dict[str, Any]]]:
+    """(offset, part info) to resume from, or (0, None) when the .part file cannot be trusted."""
+    part_path, info_path = _part_paths(out_path)
+    try:
+        info = json.loads(info_path.read_text(encoding="utf-8"))
+        size = part_path.stat().st_size
+    except (OSError, ValueError):
+        _discard_part(out_path)
+        return 0, None
+    total = info.get("total")
+    if info.get("url") != url or not _if_range(info) or size == 0 or (total is not None and size >= total):
+        _discard_part(out_path)
+        return 0, None
+    return size, info
+
+
+def _content_range(value: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+    """(start, total) from "bytes 100-199/200" (total None for "*")."""
+    try:
+        unit, _, rng = (value or "").partition(" ")
+        span, _, total = rng.partition("/")
+        start = int(span.split("-")[0])
+        return (start, None if total == "*" else int(total)) if unit == "bytes" else (None, None)
+    except ValueError:
+        return None, None
+
+
 def download_file(
     url: str,
     out_path: Path,
-    timeout: int = 60,
+    timeout: Union[float, Tuple[float, float]] = (10, 60),
     headers: Optional[dict] = None,
+    *,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+    client: Optional[DownloadClient] = None,
+    prev_sha256: Optional[str] = None,
+    resume_attempts: int = 3,
 ) -> Dict[str, Any]:
+    """
+    Download url -> out_path and return metadata.
+
+    The body is streamed to "<out_path>.part" and hashed on the fly (meta["sha256"]),
+    so the file never has to be read back. The .part file then atomically replaces
+    out_path, unless the bytes are identical to prev_sha256 (state's file_sha256), in
+    which case the existing file is kept (meta["changed"] is False). A failed or partial
+    download never overwrites the last good copy.
+
+    Interrupted transfers resume: the .part file is kept, with the validators of its
+    response in "<out_path>.part.json", and the next attempt (up to resume_attempts
+    within this call, or a later run) asks for the rest with Range + If-Range. The
+    206 answer must start at the .part size and report the same total length / ETag,
+    else the part is dropped and the file fetched whole; a server without range support
+    simply answers 200 and the file is rewritten from the start. A body shorter than
+    its Content-Length raises IncompleteDownload. Downloads ask for identity encoding
+    so byte offsets are file offsets.
+
+    timeout: seconds, or (connect, read) where read is the longest wait for the next bytes.
+
+    If etag / last_modified (from the previous run's state) are given, the request
+    is conditional (If-None-Match / If-Modified-Since). On HTTP 304 nothing is
+    written and the returned metadata has not_modified=True.
+
+    Uses the shared DownloadClient (pooled connections, per-host rate limit, retries)
+    unless a client is passed explicitly.
+    """
     out_path.parent.mkdir(parents=True, exist_ok=True)
 
-    headers = headers or {
-        "User-Agent": "Mozilla/5.0",
-        "Accept": "*/*",
-    }
+    base_headers = dict(headers or DEFAULT_HEADERS)
+    base_headers.setdefault("Accept-Encoding", "identity")
+    base_headers.update(conditional_headers(etag, last_modified))
 
-    with requests.Session() as s:
-        r = s.get(url, headers=headers, allow_redirects=True, stream=True, timeout=timeout)
+    client = client or get_client()
+    attempt = 0
+    while True:
+        offset, info = _resume_point(url, out_path)
+        try:
+            return _fetch(url, out_path, client, base_headers, timeout, offset, info, etag, last_modified, prev_sha256)
+        except _Restart:
+            continue
+        except _TRANSFER_ERRORS:
+            if attempt >= resume_attempts or not _part_paths(out_path)[1].exists():
+                raise
+            time.sleep(client.backoff(attempt))
+            attempt += 1
+
+
+def _fetch(
+    url: str,
+    out_path: Path,
+    client: DownloadClient,
+    base_headers: Dict[str, str],
+    timeout: Union[float, Tuple[float, float]],
+    offset: int,
+    info: Optional[Dict[str, Any]],
+    etag: Optional[str],
+    last_modified: Optional[str],
+    prev_sha256: Optional[str],
+) -> Dict[str, Any]:
+    """One GET of url (a ranged one when offset > 0); see download_file."""
+    part_path, info_path = _part_paths(out_path)
+    req_headers = dict(base_headers)
+    if offset:
+        req_headers["Range"] = f"bytes={offset}-"
+        req_headers["If-Range"] = _if_range(info)
+
+    with client.get(url, headers=req_headers, allow_redirects=True, stream=True, timeout=timeout) as r:
+        if r.status_code == 304:
+            _discard_part(out_path)  # the upstream file is the one we already have
+            return {
+                "not_modified": True,
+                "status_code": 304,
+                "last_modified": r.headers.get("Last-Modified") or last_modified,
+                "etag": r.headers.get("ETag") or etag,
+                "url": url,
+                "final_url": r.url,
+                "path": str(out_path),
+                "checked_at_utc": _utc_now(),
+            }
+        if r.status_code == 416 and offset:
+            # our offset is past the end: the file changed under us
+            _discard_part(out_path)
+            raise _Restart()
         r.raise_for_status()
-        with open(out_path, "wb") as f:
-            for chunk in r.iter_content(chunk_size=1024 * 1024):
-                if chunk:
-                    f.write(chunk)
 
-    downloaded_at_utc = datetime.datetime.utcnow().replace(microsecond=0).isoformat() + "Z"
+        h = hashlib.sha256()
+        encoded = r.headers.get("Content-Encoding", "identity").lower() != "identity"
+        resumed_from = 0
+        if offset and r.status_code == 206:
+            start, total = _content_range(r.headers.get("Content-Range"))
+            resp_etag = r.headers.get("ETag")
+            if (
+                start != offset
+                or encoded
+                or (info.get("total") is not None and total != info["total"])
+                or (resp_etag and info.get("etag") and resp_etag != info["etag"])
+            ):
+                _discard_part(out_path)
+                raise _Restart()
+            with open(part_path, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    h.update(chunk)
+            resumed_from = offset
+            resp = {k: info.get(k) for k in ("etag", "last_modified", "content_type")}
+        else:
+            # full body (no range asked, or the server ignored / refused it)
+            length = r.headers.get("Content-Length")
+            total = int(length) if length and length.isdigit() and not encoded else None
+            resp = {
+                "etag": r.headers.get("ETag"),
+                "last_modified": r.headers.get("Last-Modified"),
+                "content_type": r.headers.get("Content-Type"),
+            }
+            part_path.unlink(missing_ok=True)
+            info_path.unlink(missing_ok=True)
+            if _if_range(resp) and not encoded:
+                info_path.write_text(json.dumps({"url": url, "total": total, **resp}), encoding="utf-8")
+
+        n_bytes = resumed_from
+        try:
+            with open(part_path, "ab" if resumed_from else "wb") as f:
+                # small reads: bytes of a read cut short by a dropped connection are lost
+                for chunk in r.iter_content(chunk_size=64 * 1024):
+                    if chunk:
+                        f.write(chunk)
+                        h.update(chunk)
+                        n_bytes += len(chunk)
+            if total is not None and n_bytes != total:
+                raise IncompleteDownload(f"{url}: got {n_bytes} of {total} bytes")
+        except BaseException:
+            if not info_path.exists():
+                part_path.unlink(missing_ok=True)  # nothing to resume against
+            raise
+
+    file_hash = h.hexdigest()
+    changed = not (prev_sha256 == file_hash and out_path.exists())
+    if changed:
+        os.replace(part_path, out_path)
+    else:
+        part_path.unlink()
+    info_path.unlink(missing_ok=True)
 
     return {
-        "bytes": out_path.stat().st_size,
-        "last_modified": r.headers.get("Last-Modified"),
-        "etag": r.headers.get("ETag"),
+        "not_modified": False,
+        "changed": changed,
+        "sha256": file_hash,
+        "status_code": r.status_code,
+        "bytes": n_bytes,
+        "resumed_from": resumed_from,
+        "last_modified": resp["last_modified"],
+        "etag": resp["etag"],
         "url": url,
         "final_url": r.url,
         "path": str(out_path),
-        "downloaded_at_utc": downloaded_at_utc,
-        "content_type": r.headers.get("Content-Type"),
-        "content_length": r.headers.get("Content-Length"),
+        "downloaded_at_utc": _utc_now(),
+        "content_type": resp["content_type"],
+        "content_length": str(n_bytes),
     }
 
 
 def is_new_by_hash(prev_hash: Optional[str], new_hash: str) -> bool:
     return prev_hash != new_hash
+
+
+def download_many(
+    jobs: Iterable[Dict[str, Any]],
+    *,
+    concurrency: int = 8,
+    client: Optional[DownloadClient] = None,
+) -> List[Union[Dict[str, Any], BaseException]]:
+    """
+    Download several sources concurrently (a thread pool over download_file), for scripts.
+
+    Each job is a dict of download_file kwargs (url, out_path, headers, etag, ...).
+    Returns one result per job, in order: the download metadata, or the exception
+    raised for that job (one failing source does not cancel the rest).
+    Per-host politeness is still enforced by the shared client.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    client = client or get_client()
+
+    def one(job: Dict[str, Any]) -> Union[Dict[str, Any], BaseException]:
+        try:
+            return download_file(client=client, **job)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as ex:
+        return list(ex.map(one, list(jobs)))
@@ -0,0 +1,332 @@
+# etl/core/engine.py
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from etl.core.artifacts import ArtifactStore, code_version
+from etl.core.download import download_file, is_new_by_hash, sha256_file
+from etl.core.metrics import NULL_METRICS, RunMetrics
+from etl.core.registry import get_spec, load_extractor
+
+if TYPE_CHECKING:
+    # pandas / numpy (via fingerprint) are imported only once a run gets past the download,
+    # so a 304 / same-file run never pays for them
+    import pandas as pd
+
+    from etl.core.fingerprint import PartitionPlan
+
+# the stages every pipeline goes through, in order
+STAGES = ("download", "extract", "fingerprint", "partition", "compare")
+
+# validators/metadata copied from the download metadata into state
+_META_KEYS = ("last_modified", "etag", "content_length", "final_url", "downloaded_at_utc")
+
+
+class Pipeline:
+    """
+    Shared download -> extract -> fingerprint -> partition -> compare -> state flow.
+
+    A pipeline subclasses this, sets the class attributes below and implements
+    compare() and latest_period(); run() does the rest. The source URL and the
+    extractor come from the registry (etl/pipelines/registry.json) unless the
+    subclass sets SOURCE_URL / overrides extract().
+
+    Stage outputs are memoized in an ArtifactStore (data/cache/artifacts/), keyed by the
+    stage inputs and the source of the modules the stage depends on (EXTRACT_CODE /
+    COMPARE_CODE):
+    - download: the fetched file is kept by content hash; a run that failed after the
+      download revalidates that copy (conditional GET) instead of refetching it
+    - extract: the DataFrame, keyed by file sha256
+    - compare: the deliverable + report bytes and counts, keyed by data digest + base file
+    So a re-run after a late failure, or after editing only the compare code, does not
+    download or extract again.
+    """
+
+    pipeline_id: str = ""
+    display_name: str = ""
+
+    SOURCE_URL: str = ""                                 # "" = source_url of the registry entry
+    DOWNLOAD_NAME: str = ""                              # file name under data/downloads/<pipeline_id>/
+    DOWNLOAD_HEADERS: Optional[Dict[str, str]] = None   # None = download.DEFAULT_HEADERS
+
+    DB_PATH: Path = Path()
+    DELIVERABLE_NAME: str = ""                           # file name under data/outputs/<pipeline_id>/
+
+    KEY_COLS: List[str] = []        # row key; also the sort order for data fingerprints
+    PARTITION_COLS: List[str] = []  # period partitions for the per-partition fingerprints
+
+    # modules whose source is part of the artifact key of each stage
+    EXTRACT_CODE: Tuple[str, ...] = ()
+    COMPARE_CODE: Tuple[str, ...] = ()
+
+    # the runner replaces this with a RunMetrics collecting the stage spans
+    metrics: RunMetrics = NULL_METRICS
+    # None = default store; USE_ARTIFACTS = False disables memoization
+    artifacts: Optional[ArtifactStore] = None
+    USE_ARTIFACTS: bool = True
+    # append each compare's UPDATE / ADD_ROW records to data/changelog/changelog.sqlite
+    USE_CHANGELOG: bool = True
+
+    # ---- to implement ----
+
+    def extract(self, path: Path, *, file_sha256: str) -> pd.DataFrame:
+        return load_extractor(self.pipeline_id)(path)
+
+    def compare(self, db_path: Path, df: pd.DataFrame, out_path: Path, report_path: Path) -> Any:
+        """Compare df with the DB at db_path, write deliverable + report; returns a *UpdateResult."""
+        raise NotImplementedError
+
+    def latest_period(self, df: pd.DataFrame) -> str:
+        raise NotImplementedError
+
+    # ---- source / paths ----
+
+    @property
+    def source_url(self) -> str:
+        if self.SOURCE_URL:
+            return self.SOURCE_URL
+        spec = get_spec(self.pipeline_id)
+        return spec.source_url if spec else ""
+
+    @property
+    def download_path(self) -> Path:
+        return Path("data/downloads") / self.pipeline_id / self.DOWNLOAD_NAME
+
+    @property
+    def deliverable_path(self) -> Path:
+        return Path("data/outputs") / self.pipeline_id / self.DELIVERABLE_NAME
+
+    @property
+    def report_path(self) -> Path:
+        return Path("data/reports") / self.pipeline_id / "update_report.csv"
+
+    # ---- artifacts ----
+
+    def _store(self) -> Optional[ArtifactStore]:
+        if not self.USE_ARTIFACTS:
+            return None
+        if self.artifacts is None:
+            self.artifacts = ArtifactStore()
+        return self.artifacts
+
+    def _memo(
+        self,
+        stage: str,
+        inputs: Dict[str, Any],
+        code: Sequence[str],
+        compute: Callable[[], Any],
+        span=None,
+    ) -> Any:
+        store = self._store()
+        if store is None:
+            return compute()
+        key = store.key(f"{self.pipeline_id}/{stage}", inputs, code_version(code))
+        hit = store.get(key)
+        if span is not None:
+            span.cached = hit is not None
+        if hit is not None:
+            return hit
+        out = compute()
+        store.put(key, out)
+        return out
+
+    # ---- stages ----
+
+    def _local_copy(self, path: Path, sha256: str, store: ArtifactStore) -> bool:
+        if path.exists() and sha256_file(path) == sha256:
+            return True
+        return store.restore_blob(sha256, path)
+
+    def _download(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        path = self.download_path
+        store = self._store()
+        etag, last_modified, prev = state.get("etag"), state.get("last_modified"), state.get("file_sha256")
+
+        ckpt_key = ckpt = None
+        if store is not None:
+            ckpt_key = store.key(f"{self.pipeline_id}/download", {"url": self.source_url})
+            ckpt = store.get(ckpt_key)
+        resumed = False
+        if ckpt and ckpt["sha256"] != prev and self._local_copy(path, ckpt["sha256"], store):
+            # an earlier run fetched a newer file but never finished: revalidate that copy
+            etag, last_modified, prev = ckpt.get("etag"), ckpt.get("last_modified"), ckpt["sha256"]
+            resumed = True
+
+        meta = download_file(
+            self.source_url,
+            path,
+            headers=self.DOWNLOAD_HEADERS,
+            etag=etag,
+            last_modified=last_modified,
+            prev_sha256=prev,
+        )
+        if meta.get("not_modified"):
+            if not resumed:
+                return meta
+            return {**ckpt, "not_modified": False, "changed": False, "bytes": 0, "path": str(path)}
+
+        if store is not None:
+            store.put_blob(path, meta["sha256"])
+            store.put(ckpt_key, {"sha256": meta["sha256"], **{k: meta.get(k) for k in _META_KEYS}})
+        return meta
+
+    def _log_changes(self, result: Any, base_hash: Optional[str], file_hash: str, data_hash: str) -> None:
+        if not self.USE_CHANGELOG or getattr(result, "base_df", None) is None:
+            return
+        from etl.core.changelog import get_changelog
+
+        get_changelog().log_compare(
+            self.pipeline_id,
+            key_cols=self.KEY_COLS,
+            base_df=result.base_df,
+            report_df=result.report_df,
+            updated_df=result.updated_df,
+            base_sha256=base_hash,
+            out_path=self.deliverable_path,
+            file_sha256=file_hash,
+            data_sha256=data_hash,
+        )
+
+    def _compare(self, plan: PartitionPlan, file_hash: str, data_hash: str) -> Dict[str, Any]:
+        out_path, report_path = self.deliverable_path, self.report_path
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # hashed before compare(): in partition mode the base is the deliverable it overwrites
+        base_hash = sha256_file(plan.base_path) if plan.base_path.exists() else None
+
+        def compute() -> Dict[str, Any]:
+            result = self.compare(plan.base_path, plan.df, out_path, report_path)
+            # a memoized compare was logged by the run that computed it
+            self._log_changes(result, base_hash, file_hash, data_hash)
+            return {
+                "rows_before": result.rows_before,
+                "rows_after": result.rows_after,
+                "updated_cells": result.updated_cells,
+                "new_rows": result.new_rows,
+                "deliverable": out_path.read_bytes(),
+                "report": report_path.read_bytes(),
+            }
+
+        store = self._store()
+        if store is None:
+            return compute()
+        inputs = {
+            "data_sha256": data_hash,
+            "changed": plan.changed,
+            "base_sha256": base_hash,
+            "deliverable": str(out_path),
+        }
+        key = store.key(f"{self.pipeline_id}/compare", inputs, code_version(self.COMPARE_CODE))
+        hit = store.get(key)
+        if hit is None:
+            # compare_and_update_* record their own read_db / compare / write stages
+            out = compute()
+            store.put(key, out)
+            return out
+
+        with self.metrics.stage("compare", rows_in=len(plan.df)) as span:
+            span.cached = True
+            out_path.write_bytes(hit["deliverable"])
+            report_path.write_bytes(hit["report"])
+            span.rows_out = hit["rows_after"]
+        return hit
+
+    # ---- the flow ----
+
+    def run(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        # 1) Download (conditional GET when state has validators)
+        with self.metrics.stage("download") as span:
+            meta = self._download(state)
+            span.bytes = meta.get("bytes")
+        if meta.get("not_modified"):
+            return {"status": "skipped", "message": "Source not modified (HTTP 304).", "state": state}
+
+        file_hash = meta["sha256"]  # hashed while streaming
+
+        # 2) File freshness (bytes)
+        if not is_new_by_hash(state.get("file_sha256"), file_hash):
+            # keep the validators fresh so the next run can be a 304
+            new_state = dict(state)
+            new_state.update({
+                "last_modified": meta.get("last_modified"),
+                "etag": meta.get("etag"),
+                "content_length": meta.get("content_length"),
+            })
+            return {"status": "skipped", "message": "No new file detected (same file SHA256).", "state": new_state}
+
+        from etl.core.fingerprint import DEFAULT_MODE, plan_partition_compare, same_data
+
+        # 3) Extract (memoized on the file hash)
+        path = self.download_path
+        with self.metrics.stage("extract") as span:
+            df = self._memo(
+                "extract",
+                {"file_sha256": file_hash},
+                self.EXTRACT_CODE,
+                lambda: self.extract(path, file_sha256=file_hash),
+                span,
+            )
+            span.rows_out = len(df)
+
+        latest_period = self.latest_period(df)
+        new_state = dict(state)
+        new_state.update({k: meta.get(k) for k in _META_KEYS})
+        new_state.update({
+            "file_sha256": file_hash,
+            "last_download_path": str(path),
+            "latest_period_seen": latest_period,
+            "data_sha256_mode": DEFAULT_MODE,
+        })
+
+        # 4) Data freshness (actual extracted data)
+        with self.metrics.stage("fingerprint", rows_in=len(df)):
+            same, data_hash = same_data(df, state, sort_cols=self.KEY_COLS)
+        new_state["data_sha256"] = data_hash
+        if same:
+            return {
+                "status": "skipped",
+                "message": "File changed, but extracted data is identical (same data SHA256).",
+                "state": new_state,
+            }
+
+        # 5) Only partitions whose digest changed since the last delivery are diffed,
+        #    against that delivery; full compare vs the DB otherwise
+        with self.metrics.stage("partition", rows_in=len(df)) as span:
+            plan = plan_partition_compare(
+                df,
+                state,
+                partition_cols=self.PARTITION_COLS,
+                db_path=self.DB_PATH,
+                sort_cols=self.KEY_COLS,
+            )
+            span.rows_out = len(plan.df)
+
+        # 6) Compare/update -> deliverable + report
+        result = self._compare(plan, file_hash, data_hash)
+
+        new_state.update({
+            "partition_sha256": plan.hashes,
+            "db_signature": plan.db_signature,
+            "deliverable_path": str(self.deliverable_path),
+            "deliverable_sha256": hashlib.sha256(result["deliverable"]).hexdigest(),
+            "update_report_csv": str(self.report_path),
+        })
+
+        kind = "CSV" if self.deliverable_path.suffix.lower() == ".csv" else "Excel"
+        msg = (
+            f"Extracted {len(df)} rows. "
+            f"{kind} rows {result['rows_before']} -> {result['rows_after']}. "
+            f"Updated cells={result['updated_cells']}, New rows={result['new_rows']}. "
+            f"Partitions diffed={'all' if plan.changed is None else len(plan.changed)}. "
+            f"Deliverable={self.deliverable_path}"
+        )
+        return {
+            "status": "delivered",
+            "message": msg,
+            "state": new_state,
+            "rows_extracted": len(df),
+            "rows_after": result["rows_after"],
+        }
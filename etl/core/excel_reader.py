@@ -0,0 +1,180 @@
+# etl/core/excel_reader.py
+from __future__ import annotations
+
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Callable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+
+Row = Tuple[Any, ...]
+SheetRef = Union[int, str]
+
+
+def _xlsx_value(v: Any) -> Any:
+    # like pandas: 2019.0 -> 2019
+    return int(v) if isinstance(v, float) and v.is_integer() else v
+
+
+def _xlsx_rows(path: Path, sheet: SheetRef, cols: Optional[List[int]]) -> Iterator[Row]:
+    import openpyxl
+
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[sheet] if isinstance(sheet, int) else wb[sheet]
+        # publisher files often carry a wrong <dimension>; don't trust it
+        ws.reset_dimensions()
+        kw = {"min_col": min(cols) + 1, "max_col": max(cols) + 1} if cols else {}
+        offset = min(cols) if cols else 0
+        for vals in ws.iter_rows(values_only=True, **kw):
+            if cols:
+                yield tuple(_xlsx_value(vals[c - offset]) if c - offset < len(vals) else None for c in cols)
+            else:
+                yield tuple(_xlsx_value(v) for v in vals)
+    finally:
+        wb.close()
+
+
+def _xls_value(cell, datemode: int) -> Any:
+    import xlrd
+
+    if cell.ctype in (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK):
+        return None
+    if cell.ctype == xlrd.XL_CELL_DATE:
+        return xlrd.xldate_as_datetime(cell.value, datemode)
+    if cell.ctype == xlrd.XL_CELL_BOOLEAN:
+        return bool(cell.value)
+    if cell.ctype == xlrd.XL_CELL_NUMBER and float(cell.value).is_integer():
+        return int(cell.value)  # like pandas: 2019.0 -> 2019
+    if cell.ctype == xlrd.XL_CELL_ERROR:
+        return None
+    return cell.value
+
+
+def _xls_rows(path: Path, sheet: SheetRef, cols: Optional[List[int]]) -> Iterator[Row]:
+    import xlrd
+
+    # on_demand: only the requested sheet is parsed
+    book = xlrd.open_workbook(str(path), on_demand=True)
+    try:
+        sh = book.sheet_by_index(sheet) if isinstance(sheet, int) else book.sheet_by_name(sheet)
+        for r in range(sh.nrows):
+            cells = sh.row(r)
+            if cols:
+                yield tuple(_xls_value(cells[c], book.datemode) if c < len(cells) else None for c in cols)
+            else:
+                yield tuple(_xls_value(c, book.datemode) for c in cells)
+    finally:
+        book.release_resources()
+
+
+def iter_sheet_rows(
+    path: Path,
+    *,
+    sheet: SheetRef = 0,
+    usecols: Optional[Sequence[int]] = None,
+    stop: Optional[Callable[[Row], bool]] = None,
+) -> Iterator[Row]:
+    """
+    Stream the rows of one sheet as tuples, without loading the workbook into memory.
+    - .xlsx/.xlsm: openpyxl read_only mode; .xls: xlrd with on-demand sheets
+    - usecols: 0-based column positions to keep (in that order)
+    - stop: sentinel predicate; reading ends before the first row where stop(row) is True
+    """
+    path = Path(path)
+    cols = list(usecols) if usecols is not None else None
+    reader = _xls_rows if path.suffix.lower() == ".xls" else _xlsx_rows
+
+    with closing(reader(path, sheet, cols)) as rows:
+        for row in rows:
+            if stop is not None and stop(row):
+                return
+            yield row
+
+
+def iter_sheet_batches(
+    path: Path,
+    *,
+    batch_size: int = 5000,
+    **kwargs,
+) -> Iterator[List[Row]]:
+    """iter_sheet_rows grouped into lists of up to batch_size rows."""
+    batch: List[Row] = []
+    for row in iter_sheet_rows(path, **kwargs):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _is_blank(row: Row) -> bool:
+    return all(v is None or (isinstance(v, str) and not v.strip()) for v in row)
+
+
+def read_sheet(
+    path: Path,
+    *,
+    sheet: SheetRef = 0,
+    usecols: Optional[Sequence[int]] = None,
+    header: Optional[int] = None,
+    columns: Optional[Sequence[str]] = None,
+    stop: Optional[Callable[[Row], bool]] = None,
+    batch_size: int = 5000,
+) -> pd.DataFrame:
+    """
+    DataFrame from a streamed sheet (a leaner pd.read_excel for extractors / DB sheets).
+
+    - header=None: columns are positions (0..n-1), all rows are data
+    - header=i: row i holds the column names (blank -> "Unnamed: <pos>"), data follows it;
+      with `columns`, only those named columns are kept (looked up in the header row)
+    Trailing blank rows and trailing empty columns are dropped (as pd.read_excel does).
+    """
+    path = Path(path)
+
+    if columns is not None:
+        if header is None:
+            raise ValueError("columns= needs a header row")
+        head: Row = ()
+        with closing(iter_sheet_rows(path, sheet=sheet)) as it:
+            for i, row in enumerate(it):
+                if i == header:
+                    head = row
+                    break
+        names = [str(v).strip() if v is not None else None for v in head]
+        missing = [c for c in columns if c not in names]
+        if missing:
+            raise ValueError(f"Columns not found in header: {missing}")
+        usecols = [names.index(c) for c in columns]
+
+    rows: List[Row] = []
+    for batch in iter_sheet_batches(path, sheet=sheet, usecols=usecols, stop=stop, batch_size=batch_size):
+        rows.extend(batch)
+
+    while rows and _is_blank(rows[-1]):
+        rows.pop()
+
+    # read-only sheets yield ragged rows (and styled-but-empty trailing cells):
+    # cut to the last column holding a value, pad shorter rows
+    width = 0
+    for r in rows:
+        for i in range(len(r) - 1, width - 1, -1):
+            if r[i] is not None:
+                width = i + 1
+                break
+    if usecols is not None:
+        width = len(list(usecols))
+    rows = [r[:width] + (None,) * (width - len(r)) for r in rows]
+
+    if header is None:
+        return pd.DataFrame(rows, columns=list(range(width)))
+
+    if len(rows) <= header:
+        return pd.DataFrame()
+    positions = list(usecols) if usecols is not None else list(range(len(rows[header])))
+    names = [
+        str(v).strip() if v is not None else f"Unnamed: {pos}"
+        for pos, v in zip(positions, rows[header])
+    ]
+    return pd.DataFrame(rows[header + 1 :], columns=names)
@@ -0,0 +1,150 @@
+# etl/core/excel_writer.py
+from __future__ import annotations
+
+from bisect import bisect_left
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import pandas as pd
+import openpyxl
+
+
+def _cell_value(v: Any) -> Any:
+    """pandas/numpy scalar -> plain Python value openpyxl writes cleanly."""
+    if v is None:
+        return None
+    try:
+        if pd.isna(v):
+            return None
+    except (TypeError, ValueError):
+        pass
+    return v.item() if hasattr(v, "item") else v
+
+
+def _key_part(v: Any) -> Any:
+    v = _cell_value(v)
+    return v.strip() if isinstance(v, str) else v
+
+
+def sheet_header(ws, header_row: int = 1) -> Dict[str, int]:
+    """Column name -> 1-based column index, from the header row."""
+    out: Dict[str, int] = {}
+    for cell in next(ws.iter_rows(min_row=header_row, max_row=header_row)):
+        if cell.value is not None:
+            out[str(cell.value).strip()] = cell.column
+    return out
+
+
+def _sort_key(key: tuple) -> tuple:
+    # NA keys sort first; keeps mixed None / value tuples comparable
+    return tuple((v is not None, v) for v in key)
+
+
+def patch_sheet(
+    ws,
+    updated_df: pd.DataFrame,
+    report_df: pd.DataFrame,
+    key_cols: List[str],
+    *,
+    header_row: int = 1,
+) -> Tuple[int, int]:
+    """
+    Apply a compare report to an existing worksheet in place:
+    - UPDATE rows: only the changed cell is rewritten (value taken from updated_df)
+    - ADD_ROW rows: inserted in key order, i.e. after the last sheet row with a smaller
+      key (a plain append when they are newer than everything, the usual case)
+
+    Everything else in the sheet (styles, column widths, other sheets) is left alone.
+    Key order assumes the sheet is sorted by key_cols, like the "rewrite" output.
+    Inserting rows in the middle shifts the rows below; openpyxl does not rewrite
+    formulas that point at shifted cells.
+    Returns (cells_written, rows_added).
+    """
+    header = sheet_header(ws, header_row)
+    missing = [c for c in list(key_cols) + list(updated_df.columns) if c not in header]
+    if missing:
+        raise ValueError(f"Columns not found in sheet header: {missing}")
+
+    # key tuple -> sheet row, reading only the key columns
+    key_idx = [header[c] for c in key_cols]
+    lo, hi = min(key_idx), max(key_idx)
+    row_of: Dict[tuple, int] = {}
+    for r_num, vals in enumerate(
+        ws.iter_rows(min_row=header_row + 1, min_col=lo, max_col=hi, values_only=True),
+        start=header_row + 1,
+    ):
+        key = tuple(_key_part(vals[i - lo]) for i in key_idx)
+        if all(k is None for k in key):
+            continue
+        row_of[key] = r_num
+
+    if report_df.empty:
+        return 0, 0
+
+    new_by_key = updated_df.set_index(key_cols)
+    keys = [tuple(_key_part(v) for v in k) for k in report_df[key_cols].itertuples(index=False, name=None)]
+
+    cells = 0
+    added: List[Tuple[tuple, Any]] = []
+    for key, change, field, raw_key in zip(
+        keys,
+        report_df["ChangeType"],
+        report_df["Field"],
+        report_df[key_cols].itertuples(index=False, name=None),
+    ):
+        lookup = raw_key if len(key_cols) > 1 else raw_key[0]
+        if change == "UPDATE":
+            r_num = row_of.get(key)
+            if r_num is None:
+                raise KeyError(f"Row {key} not found in sheet")
+            # assign .value: ws.cell(..., value=None) would keep the old value when the new one is NA
+            ws.cell(row=r_num, column=header[field]).value = _cell_value(new_by_key.loc[lookup, field])
+            cells += 1
+        elif change == "ADD_ROW":
+            added.append((key, new_by_key.loc[lookup]))
+
+    if not added:
+        return cells, 0
+
+    # anchor = last existing row whose key sorts before the new key (header_row: before all)
+    existing = sorted((_sort_key(k), r) for k, r in row_of.items())
+    existing_keys = [k for k, _ in existing]
+    last_row = max(row_of.values(), default=header_row)
+    groups: Dict[int, List[Tuple[tuple, Any]]] = {}
+    for key, row in sorted(added, key=lambda kr: _sort_key(kr[0])):
+        pos = bisect_left(existing_keys, _sort_key(key))
+        if pos == len(existing):
+            anchor = last_row  # newer than every row: append
+        else:
+            anchor = existing[pos - 1][1] if pos else header_row
+        groups.setdefault(anchor, []).append((key, row))
+
+    # bottom-up, so the anchors above are not shifted by the inserts below
+    for anchor in sorted(groups, reverse=True):
+        rows = groups[anchor]
+        if anchor < last_row:
+            ws.insert_rows(anchor + 1, amount=len(rows))
+        for i, (key, row) in enumerate(rows, start=anchor + 1):
+            for c, v in zip(key_cols, key):
+                ws.cell(row=i, column=header[c]).value = v
+            for c in new_by_key.columns:
+                ws.cell(row=i, column=header[c]).value = _cell_value(row[c])
+
+    return cells, len(added)
+
+
+def write_new_workbook(df: pd.DataFrame, out_path: Path, *, sheet: str = "Sheet1") -> Path:
+    """
+    Fast path for building a deliverable from scratch: openpyxl write-only mode
+    streams rows to disk without keeping a cell model in memory.
+    """
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet(title=sheet)
+    ws.append([str(c) for c in df.columns])
+    for row in df.itertuples(index=False, name=None):
+        ws.append([_cell_value(v) for v in row])
+    wb.save(out_path)
+    return out_path
@@ -2,14 +2,30 @@
 from __future__ import annotations
 
 import hashlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
 import pandas as pd
 
+from etl.core.download import sha256_file
+
+# "columnar": hashes typed column buffers (fast, dtype-stable)
+# "legacy":   hashes the CSV text (the original digests, kept so old state stays valid)
+FINGERPRINT_MODES = ("columnar", "legacy")
+DEFAULT_MODE = "columnar"
+
+_COLUMNAR_TAG = b"etl-fingerprint-columnar-v1"
+_NUMERIC_KINDS = ("integer", "floating", "mixed-integer-float", "decimal", "boolean")
+
 
 def dataframe_sha256(
     df: pd.DataFrame,
     *,
     sort_cols: list[str] | None = None,
     float_round: int = 6,
+    mode: str = DEFAULT_MODE,
 ) -> str:
     """
     Stable hash of the DATA (not formatting):
@@ -17,8 +33,21 @@ def dataframe_sha256(
     - sort columns
     - normalize NaN
     - round floats
-    - hash CSV bytes
+    - hash column buffers (mode="columnar") or CSV bytes (mode="legacy")
     """
+    if mode == "columnar":
+        return _columnar_sha256(df, sort_cols=sort_cols, float_round=float_round)
+    if mode != "legacy":
+        raise ValueError(f"Unknown fingerprint mode: {mode}")
+    return _legacy_sha256(df, sort_cols=sort_cols, float_round=float_round)
+
+
+def _legacy_sha256(
+    df: pd.DataFrame,
+    *,
+    sort_cols: list[str] | None,
+    float_round: int,
+) -> str:
     x = df.copy()
 
     # Ensure stable column order
@@ -40,3 +69,224 @@ def dataframe_sha256(
 
     csv_bytes = x.to_csv(index=False, lineterminator="\n").encode("utf-8")
     return hashlib.sha256(csv_bytes).hexdigest()
+
+
+def _numeric_view(s: pd.Series) -> pd.Series | None:
+    """Float64 view of a numeric-looking column (any int/float/bool dtype or all-number objects)."""
+    if pd.api.types.is_bool_dtype(s.dtype) or pd.api.types.is_numeric_dtype(s.dtype):
+        return pd.to_numeric(s.astype("Float64") if pd.api.types.is_bool_dtype(s.dtype) else s)
+    if s.dtype == object and pd.api.types.infer_dtype(s, skipna=True) in _NUMERIC_KINDS:
+        return pd.to_numeric(s, errors="coerce")
+    return None
+
+
+def _column_buffers(s: pd.Series, float_round: int) -> Tuple[bytes, np.ndarray, Any]:
+    """
+    (tag, NA mask as uint8, payload) for one column, row-aligned so any row range can be hashed:
+    - b"N": rounded little-endian float64 (NA -> 0.0)
+    - b"D": datetime64[ns] as little-endian int64 (NA -> 0)
+    - b"S": list of UTF-8 encoded str(value) per row (NA -> b"")
+    """
+    na = s.isna().to_numpy(dtype=bool)
+
+    num = _numeric_view(s)
+    if num is not None:
+        vals = num.to_numpy(dtype="float64", na_value=np.nan)
+        vals = np.round(vals, float_round) + 0.0  # +0.0 folds -0.0 into 0.0
+        vals[na] = 0.0
+        return b"N", na.astype(np.uint8), vals.astype("<f8")
+
+    if pd.api.types.is_datetime64_any_dtype(s.dtype):
+        vals = s.dt.tz_localize(None) if getattr(s.dt, "tz", None) is not None else s
+        ints = vals.astype("datetime64[ns]").to_numpy().view("int64").copy()
+        ints[na] = 0
+        return b"D", na.astype(np.uint8), ints.astype("<i8")
+
+    encoded = [b"" if m else str(v).encode("utf-8") for v, m in zip(s.to_numpy(dtype=object), na)]
+    return b"S", na.astype(np.uint8), encoded
+
+
+def _hash_rows(h, name: str, tag: bytes, na: np.ndarray, payload: Any, start: int, stop: int) -> None:
+    name_b = str(name).encode("utf-8")
+    h.update(len(name_b).to_bytes(8, "little"))
+    h.update(name_b)
+    h.update(tag)
+    h.update(na[start:stop].tobytes())
+    if tag != b"S":
+        h.update(payload[start:stop].tobytes())
+        return
+    # text / mixed: length-prefixed UTF-8 of str(value), NA excluded via the mask
+    part = payload[start:stop]
+    keep = ~na[start:stop].astype(bool)
+    h.update(np.array([len(b) for b in part], dtype="<u8")[keep].tobytes())
+    h.update(b"".join(part))
+
+
+def _update_column(h, name: str, s: pd.Series, float_round: int) -> None:
+    _hash_rows(h, name, *_column_buffers(s, float_round), 0, len(s))
+
+
+def _columnar_sha256(
+    df: pd.DataFrame,
+    *,
+    sort_cols: list[str] | None,
+    float_round: int,
+) -> str:
+    """
+    Hash typed column buffers directly instead of rendering CSV text.
+    Numbers hash as rounded float64 whatever their dtype (int64, Int64, float64,
+    numeric objects), so the digest does not depend on pandas' dtype choices;
+    ints beyond 2**53 lose precision like any float.
+    """
+    cols = sorted(df.columns, key=str)
+    x = df[cols]
+    order = sort_cols or cols
+    x = x.sort_values(order, kind="stable", na_position="last").reset_index(drop=True)
+
+    h = hashlib.sha256(_COLUMNAR_TAG)
+    h.update(len(x).to_bytes(8, "little"))
+    for c in cols:
+        _update_column(h, c, x[c], float_round)
+    return h.hexdigest()
+
+
+def same_data(
+    df: pd.DataFrame,
+    state: Dict[str, Any],
+    *,
+    sort_cols: list[str] | None = None,
+    float_round: int = 6,
+) -> Tuple[bool, str]:
+    """
+    Compare df with state["data_sha256"] -> (unchanged?, digest to store).
+
+    The digest returned is always DEFAULT_MODE; if the state was written with another
+    mode (older state has no "data_sha256_mode" = legacy), the comparison is done in
+    that mode once, so switching modes never triggers a spurious delivery.
+    Store the digest with "data_sha256_mode": DEFAULT_MODE.
+    """
+    digest = dataframe_sha256(df, sort_cols=sort_cols, float_round=float_round, mode=DEFAULT_MODE)
+    prev = state.get("data_sha256")
+    if not prev:
+        return False, digest
+
+    prev_mode = state.get("data_sha256_mode", "legacy")
+    if prev_mode == DEFAULT_MODE:
+        return prev == digest, digest
+    return prev == dataframe_sha256(df, sort_cols=sort_cols, float_round=float_round, mode=prev_mode), digest
+
+
+def partition_keys(df: pd.DataFrame, partition_cols: list[str]) -> pd.Series:
+    """Row -> partition label, e.g. "2024-3" for Year/Month or "2024-3-Athens"."""
+    key = df[partition_cols[0]].astype(str)
+    for c in partition_cols[1:]:
+        key = key + "-" + df[c].astype(str)
+    return key
+
+
+def partition_sha256(
+    df: pd.DataFrame,
+    partition_cols: list[str],
+    *,
+    sort_cols: list[str] | None = None,
+    float_round: int = 6,
+) -> Dict[str, str]:
+    """
+    Columnar digest per period partition: {partition label: sha256}.
+
+    Rows are sorted and the column buffers built once for the whole frame; each partition
+    then hashes its slice of those buffers (no per-group DataFrame work). Whether a column
+    hashes as numbers or text is decided on the whole frame, so for mixed object columns a
+    partition digest can differ from dataframe_sha256 of that partition alone.
+    """
+    cols = sorted(df.columns, key=str)
+    x = df[cols].reset_index(drop=True)
+    x = x.sort_values(sort_cols or cols, kind="stable", na_position="last")
+    keys = partition_keys(x, partition_cols).to_numpy(dtype=object)
+    pos = np.argsort(keys, kind="stable")
+    keys = keys[pos]
+    x = x.iloc[pos]
+
+    buffers = [(c, *_column_buffers(x[c], float_round)) for c in cols]
+    bounds = np.flatnonzero(keys[1:] != keys[:-1]) + 1
+    starts = np.concatenate([[0], bounds]) if len(keys) else np.array([], dtype=int)
+    stops = np.concatenate([bounds, [len(keys)]]) if len(keys) else np.array([], dtype=int)
+
+    out: Dict[str, str] = {}
+    for start, stop in zip(starts.tolist(), stops.tolist()):
+        h = hashlib.sha256(_COLUMNAR_TAG)
+        h.update((stop - start).to_bytes(8, "little"))
+        for c, tag, na, payload in buffers:
+            _hash_rows(h, c, tag, na, payload, start, stop)
+        out[str(keys[start])] = h.hexdigest()
+    return out
+
+
+def changed_partitions(new: Dict[str, str], old: Optional[Dict[str, str]]) -> List[str]:
+    """Partitions that are new or whose digest differs (partitions that disappeared are ignored)."""
+    old = old or {}
+    return [k for k, h in new.items() if old.get(k) != h]
+
+
+def select_partitions(df: pd.DataFrame, partition_cols: list[str], keys: List[str]) -> pd.DataFrame:
+    return df[partition_keys(df, partition_cols).isin(keys).to_numpy()].copy()
+
+
+def file_signature(path: Path) -> Optional[str]:
+    """Cheap change marker for a local file (size + mtime), None if missing."""
+    try:
+        st = Path(path).stat()
+    except FileNotFoundError:
+        return None
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+@dataclass
+class PartitionPlan:
+    base_path: Path              # what to compare against: DB file, or the previous deliverable
+    df: pd.DataFrame             # extracted rows to diff (all, or only changed partitions)
+    hashes: Dict[str, str]       # partition digests of the full extract -> state["partition_sha256"]
+    db_signature: Optional[str]  # -> state["db_signature"]
+    changed: Optional[List[str]] # None = full compare
+
+
+def plan_partition_compare(
+    df: pd.DataFrame,
+    state: Dict[str, Any],
+    *,
+    partition_cols: list[str],
+    db_path: Path,
+    sort_cols: list[str] | None = None,
+    float_round: int = 6,
+) -> PartitionPlan:
+    """
+    Decide between a full compare and a partition-only compare.
+
+    The deliverable is "DB + every change found so far", so only diffing the changed
+    partitions is valid when the base already holds the earlier changes: the previous
+    deliverable is used as the base, provided the DB file is untouched since that run
+    (same size/mtime), the previous partition digests are in state and the deliverable
+    still has the bytes that were delivered (state["deliverable_sha256"]).
+    Otherwise (first run, DB edited by hand, deliverable missing or overwritten by a run
+    that failed before saving state): full compare vs the DB.
+
+    Only the diff step is partitioned: the full extract is still hashed here (the digests
+    of every partition go back into state), the previous deliverable is hashed whole to
+    check it, and the compare still reads the whole base file.
+    """
+    hashes = partition_sha256(df, partition_cols, sort_cols=sort_cols, float_round=float_round)
+    db_sig = file_signature(db_path)
+
+    prev_out = state.get("deliverable_path")
+    if (
+        state.get("partition_sha256")
+        and db_sig is not None
+        and state.get("db_signature") == db_sig
+        and prev_out
+        and Path(prev_out).is_file()
+        and state.get("deliverable_sha256") == sha256_file(Path(prev_out))
+    ):
+        changed = changed_partitions(hashes, state["partition_sha256"])
+        return PartitionPlan(Path(prev_out), select_partitions(df, partition_cols, changed), hashes, db_sig, changed)
+
+    return PartitionPlan(Path(db_path), df, hashes, db_sig, None)
@@ -0,0 +1,155 @@
+# etl/core/metrics.py
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+METRICS_DIR = Path("data/metrics")
+
+_jsonl_lock = threading.Lock()
+
+
+@dataclass
+class StageSpan:
+    name: str
+    wall_s: float = 0.0
+    cpu_s: float = 0.0                    # CPU time of the running thread (not of worker processes)
+    bytes: Optional[int] = None           # e.g. bytes downloaded
+    rows_in: Optional[int] = None
+    rows_out: Optional[int] = None
+    peak_mem_bytes: Optional[int] = None  # only with trace_memory: peak above the stage's start
+    cached: Optional[bool] = None         # stage output came from the artifact cache
+    error: Optional[str] = None
+
+
+class RunMetrics:
+    """
+    Stage spans of one pipeline run.
+
+        with metrics.stage("extract") as span:
+            df = extract(...)
+            span.rows_out = len(df)
+
+    Each span records wall time and thread CPU time; the caller fills in bytes/rows.
+    With trace_memory=True, the peak of Python-tracked allocations (numpy/pandas included)
+    per stage is measured with tracemalloc. tracemalloc slows allocation-heavy code down
+    and is process-wide: with several pipelines in parallel threads, peaks overlap.
+    Stages are not meant to be nested.
+    """
+
+    def __init__(self, pipeline_id: str, *, trace_memory: bool = False):
+        self.pipeline_id = pipeline_id
+        self.trace_memory = trace_memory
+        self.spans: List[StageSpan] = []
+
+    @contextmanager
+    def stage(self, name: str, *, rows_in: Optional[int] = None) -> Iterator[StageSpan]:
+        span = StageSpan(name=name, rows_in=rows_in)
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing:
+            mem0 = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        w0, c0 = time.perf_counter(), time.thread_time()
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.wall_s = time.perf_counter() - w0
+            span.cpu_s = time.thread_time() - c0
+            if tracing:
+                span.peak_mem_bytes = max(0, tracemalloc.get_traced_memory()[1] - mem0)
+            self._record(span)
+
+    def _record(self, span: StageSpan) -> None:
+        self.spans.append(span)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"pipeline_id": self.pipeline_id, "stages": [asdict(s) for s in self.spans]}
+
+
+class NullMetrics(RunMetrics):
+    """Same interface, records nothing (pipelines run outside the runner)."""
+
+    def _record(self, span: StageSpan) -> None:
+        pass
+
+
+NULL_METRICS = NullMetrics("")
+
+
+def append_jsonl(record: Dict[str, Any], path: Path = METRICS_DIR / "runs.jsonl") -> None:
+    """One JSON object per line; safe for parallel pipelines in the same process."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    line = json.dumps(record, ensure_ascii=False, default=str)
+    with _jsonl_lock, path.open("a", encoding="utf-8") as f:
+        f.write(line + "\n")
+
+
+def _label(v: str) -> str:
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+_STAGE_METRICS = [
+    # (metric name, span field, help)
+    ("etl_stage_wall_seconds", "wall_s", "Wall time of a pipeline stage in the last run."),
+    ("etl_stage_cpu_seconds", "cpu_s", "Thread CPU time of a pipeline stage in the last run."),
+    ("etl_stage_bytes", "bytes", "Bytes handled by a pipeline stage in the last run."),
+    ("etl_stage_rows_in", "rows_in", "Rows into a pipeline stage in the last run."),
+    ("etl_stage_rows_out", "rows_out", "Rows out of a pipeline stage in the last run."),
+    ("etl_stage_peak_memory_bytes", "peak_mem_bytes", "Peak traced memory of a pipeline stage in the last run."),
+]
+
+
+def prometheus_text(record: Dict[str, Any]) -> str:
+    """Prometheus text exposition of one run record (see RunMetrics / runner.run_one)."""
+    pid = _label(record["pipeline_id"])
+    lines = [
+        "# HELP etl_run_duration_seconds Duration of the last pipeline run.",
+        "# TYPE etl_run_duration_seconds gauge",
+        f'etl_run_duration_seconds{{pipeline="{pid}"}} {record["duration_s"]:.6f}',
+        "# HELP etl_run_finished_timestamp_seconds Unix time the last pipeline run finished.",
+        "# TYPE etl_run_finished_timestamp_seconds gauge",
+        f'etl_run_finished_timestamp_seconds{{pipeline="{pid}"}} {record["finished_ts"]:.3f}',
+        "# HELP etl_run_status Status of the last pipeline run (1 for the current status).",
+        "# TYPE etl_run_status gauge",
+        f'etl_run_status{{pipeline="{pid}",status="{_label(record["status"])}"}} 1',
+    ]
+    for metric, attr, help_text in _STAGE_METRICS:
+        samples = [
+            f'{metric}{{pipeline="{pid}",stage="{_label(s["name"])}"}} {s[attr]}'
+            for s in record["stages"]
+            if s.get(attr) is not None
+        ]
+        if samples:
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} gauge", *samples]
+    return "\n".join(lines) + "\n"
+
+
+def write_prom(record: Dict[str, Any], out_dir: Path = METRICS_DIR) -> Path:
+    """
+    <out_dir>/<pipeline_id>.prom for node_exporter's textfile collector.
+    Written to a temp file and renamed, so the collector never reads a partial file.
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    p = out_dir / f"{record['pipeline_id']}.prom"
+    tmp = p.with_name(p.name + f".{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_text(prometheus_text(record), encoding="utf-8")
+    os.replace(tmp, p)
+    return p
+
+
+def export_run(record: Dict[str, Any], out_dir: Optional[Path] = METRICS_DIR) -> None:
+    """runs.jsonl (history) + <pipeline_id>.prom (last run). out_dir=None disables export."""
+    if out_dir is None:
+        return
+    append_jsonl(record, out_dir / "runs.jsonl")
+    write_prom(record, out_dir)
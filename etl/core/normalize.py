@@ -0,0 +1,100 @@
+# etl/core/normalize.py
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+# cells publishers use for "no data"
+DEFAULT_PLACEHOLDERS = frozenset({"", "…", "...", "—"})
+
+# separator conventions: ELSTAT XLS / English tables vs Greek-language PDFs
+# (pass as to_numeric(..., separators=EL_SEPARATORS))
+EN_SEPARATORS: Dict[str, Optional[str]] = {"decimal": ".", "thousands": ","}
+EL_SEPARATORS: Dict[str, Optional[str]] = {"decimal": ",", "thousands": "."}
+
+
+def is_text(s: pd.Series) -> pd.Series:
+    """Boolean mask of cells that are strings (vectorized; False for numbers/NA/other objects)."""
+    if pd.api.types.is_numeric_dtype(s.dtype) or pd.api.types.is_bool_dtype(s.dtype):
+        return pd.Series(False, index=s.index)
+    try:
+        return s.str.len().notna()
+    except AttributeError:  # object column without any strings
+        return pd.Series(False, index=s.index)
+
+
+def to_numeric(
+    s: pd.Series,
+    *,
+    decimal: str = ".",
+    thousands: Optional[str] = ",",
+    separators: Optional[Dict[str, Optional[str]]] = None,
+    placeholders: Iterable[str] = DEFAULT_PLACEHOLDERS,
+    as_int: bool = False,
+) -> pd.Series:
+    """
+    Bulk numeric normalization of a messy column (no per-cell Python):
+    - real numbers pass through unchanged
+    - strings are stripped; placeholders ("…", "—", ...) become NA
+    - `thousands` separators are removed, `decimal` becomes "."
+      (Greek PDFs: decimal=",", thousands="." or None); `separators` (EN_SEPARATORS /
+      EL_SEPARATORS) sets both at once
+    - anything unparseable becomes NA
+
+    Returns Float64, or Int64 (truncated like int(float(x))) when as_int=True; as with
+    int(float(x)), booleans and inf become NA there.
+    """
+    if separators is not None:
+        decimal = separators.get("decimal", decimal)
+        thousands = separators.get("thousands", thousands)
+
+    raw = s
+    if pd.api.types.is_bool_dtype(s.dtype):
+        s = s.astype("Int64")
+
+    if pd.api.types.is_numeric_dtype(s.dtype):
+        num = pd.to_numeric(s, errors="coerce")
+    else:
+        is_str = is_text(s).to_numpy()
+
+        # non-string cells (numbers, None, NaN) convert directly
+        num = pd.to_numeric(s.where(~is_str), errors="coerce").astype("Float64")
+
+        if is_str.any():
+            t = s[is_str].str.strip()
+            t = t.where(~t.isin(list(placeholders)))
+            if thousands:
+                t = t.str.replace(thousands, "", regex=False)
+            if decimal != ".":
+                t = t.str.replace(decimal, ".", regex=False)
+            num[is_str] = pd.to_numeric(t, errors="coerce").astype("Float64")
+
+    num = num.astype("Float64")
+    if as_int:
+        vals = num.to_numpy(dtype="float64", na_value=np.nan)
+        vals[~np.isfinite(vals)] = np.nan
+        if pd.api.types.is_bool_dtype(raw.dtype):
+            vals[:] = np.nan
+        elif raw.dtype == object:
+            # only cells that came out as 0 / 1 can have been booleans
+            maybe = np.flatnonzero((vals == 0) | (vals == 1))
+            if len(maybe):
+                cells = raw.iloc[maybe]
+                vals[maybe[cells.map(lambda v: isinstance(v, (bool, np.bool_))).to_numpy(dtype=bool)]] = np.nan
+        return pd.Series(pd.array(np.trunc(vals), dtype="Float64"), index=s.index).astype("Int64")
+    return num
+
+
+def to_numeric_frame(
+    df: pd.DataFrame,
+    cols: List[str],
+    **kwargs,
+) -> pd.DataFrame:
+    """Apply to_numeric to several columns of a copy of df (same keyword options)."""
+    out = df.copy()
+    for c in cols:
+        out[c] = to_numeric(out[c], **kwargs)
+    return out
@@ -0,0 +1,112 @@
+# etl/core/pdf.py
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from importlib.metadata import version
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import pandas as pd
+
+from etl.core.table_cache import TableCache
+
+# a raw table as pdfplumber returns it: list of rows, each a list of cell strings/None
+RawTable = List[List[Optional[str]]]
+
+
+def normalize_table(table: RawTable) -> pd.DataFrame:
+    """Pad ragged rows to the same length and wrap them in a DataFrame."""
+    maxlen = max(len(r) for r in table)
+    norm = [r + [None] * (maxlen - len(r)) for r in table]
+    return pd.DataFrame(norm)
+
+
+def _extract_pages(pdf_path: str, pages: Sequence[int], table_settings: Optional[Dict[str, Any]]) -> Dict[int, List[RawTable]]:
+    # one open (one parse of the document structure) for all requested pages
+    import pdfplumber  # only when pages are not in the TableCache
+
+    out: Dict[int, List[RawTable]] = {}
+    with pdfplumber.open(pdf_path) as pdf:
+        for idx in pages:
+            page = pdf.pages[idx]
+            out[idx] = page.extract_tables(table_settings or {}) or []
+            page.flush_cache()
+    return out
+
+
+def extract_page_tables(
+    pdf_path: Path,
+    pages: Sequence[int],
+    *,
+    table_settings: Optional[Dict[str, Any]] = None,
+    processes: Optional[int] = None,
+    file_sha256: Optional[str] = None,
+    cache: Optional[TableCache] = None,
+) -> Dict[int, List[RawTable]]:
+    """
+    Raw tables for each requested page (0-based), opening the PDF once.
+
+    processes > 1 spreads the pages over a process pool (extract_tables is CPU-bound
+    pure Python); each worker opens the document once for its share of pages.
+
+    If file_sha256 is given, pages already extracted from the same bytes with the same
+    settings come from the on-disk TableCache (default location unless cache is passed);
+    only the missing pages are extracted and then stored.
+    """
+    pages = list(pages)
+    out: Dict[int, List[RawTable]] = {}
+
+    # settings that change pdfplumber's output are part of the cache key
+    cache_settings = {"table_settings": table_settings or {}, "pdfplumber": version("pdfplumber")}
+    if file_sha256:
+        cache = cache or TableCache()
+        for idx in pages:
+            hit = cache.get(file_sha256, idx, cache_settings)
+            if hit is not None:
+                out[idx] = hit
+    todo = [idx for idx in pages if idx not in out]
+    if not todo:
+        return out
+
+    if not processes or processes <= 1 or len(todo) <= 1:
+        fresh = _extract_pages(str(pdf_path), todo, table_settings)
+    else:
+        n = min(processes, len(todo))
+        chunks = [todo[i::n] for i in range(n)]
+        fresh = {}
+        with ProcessPoolExecutor(max_workers=n) as ex:
+            for part in ex.map(_extract_pages, [str(pdf_path)] * n, chunks, [table_settings] * n):
+                fresh.update(part)
+
+    if file_sha256:
+        for idx, tables in fresh.items():
+            cache.put(file_sha256, idx, tables, cache_settings)
+    out.update(fresh)
+    return out
+
+
+def load_first_tables(
+    pdf_path: Path,
+    pages: Sequence[int],
+    *,
+    table_settings: Optional[Dict[str, Any]] = None,
+    processes: Optional[int] = None,
+    file_sha256: Optional[str] = None,
+    cache: Optional[TableCache] = None,
+) -> Dict[int, pd.DataFrame]:
+    """First table of each page, normalized. Raises if a page has no table."""
+    raw = extract_page_tables(
+        pdf_path,
+        pages,
+        table_settings=table_settings,
+        processes=processes,
+        file_sha256=file_sha256,
+        cache=cache,
+    )
+    out: Dict[int, pd.DataFrame] = {}
+    for idx in pages:
+        tables = raw.get(idx) or []
+        if not tables:
+            raise RuntimeError(f"No tables found on page {idx+1}")
+        out[idx] = normalize_table(tables[0])
+    return out
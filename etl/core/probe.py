@@ -0,0 +1,137 @@
+# etl/core/probe.py
+from __future__ import annotations
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from etl.core.download import DEFAULT_HEADERS, DownloadClient, conditional_headers, get_client
+from etl.core.registry import load_registry
+from etl.core.state import get_store
+from etl.core.textfmt import format_table
+
+# probe outcomes
+CHANGED = "changed"        # upstream differs from what the last run saw: worth running
+UNCHANGED = "unchanged"    # 304, or the validators match the state
+UNKNOWN = "unknown"        # the server sends no validators we can compare: only a run can tell
+ERROR = "error"            # request failed
+
+# servers that refuse HEAD: fall back to a GET whose body is never read
+_NO_HEAD = (403, 405, 501)
+
+
+@dataclass
+class ProbeResult:
+    pipeline_id: str
+    status: str
+    reason: str
+    status_code: Optional[int] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_length: Optional[str] = None
+    elapsed_s: float = 0.0
+
+
+def _compare_validators(state: Dict[str, Any], headers: Dict[str, str]) -> tuple[str, str]:
+    """(status, reason) from the response headers vs the validators stored in state."""
+    etag, last_modified, length = headers.get("ETag"), headers.get("Last-Modified"), headers.get("Content-Length")
+    if not state.get("file_sha256"):
+        return CHANGED, "never downloaded"
+    if etag and state.get("etag"):
+        return (UNCHANGED, "same ETag") if etag == state["etag"] else (CHANGED, "ETag changed")
+    if last_modified and state.get("last_modified"):
+        if last_modified != state["last_modified"]:
+            return CHANGED, "Last-Modified changed"
+        # same date: a length change still means a new file (coarse Last-Modified on some portals)
+        if length and state.get("content_length") and str(length) != str(state["content_length"]):
+            return CHANGED, "Content-Length changed"
+        return UNCHANGED, "same Last-Modified"
+    if length and state.get("content_length"):
+        if str(length) != str(state["content_length"]):
+            return CHANGED, "Content-Length changed"
+        return UNKNOWN, "only Content-Length to compare (same)"
+    return UNKNOWN, "no comparable validators"
+
+
+def probe_source(
+    pipeline_id: str,
+    url: str,
+    state: Dict[str, Any],
+    *,
+    client: Optional[DownloadClient] = None,
+    timeout: float = 15,
+    headers: Optional[dict] = None,
+) -> ProbeResult:
+    """
+    One conditional HEAD (If-None-Match / If-Modified-Since from state); nothing is downloaded.
+    If the server refuses HEAD, a conditional GET is sent and closed after the headers.
+    """
+    client = client or get_client()
+    h = dict(headers or DEFAULT_HEADERS)
+    h.update(conditional_headers(state.get("etag"), state.get("last_modified")))
+    t0 = time.perf_counter()
+    try:
+        r = client.head(url, headers=h, timeout=timeout)
+        if r.status_code in _NO_HEAD:
+            r.close()
+            r = client.get(url, headers=h, timeout=timeout, stream=True)
+        r.close()  # a streamed GET: drop the connection before any body is read
+    except Exception as e:
+        return ProbeResult(pipeline_id, ERROR, f"{type(e).__name__}: {e}", elapsed_s=time.perf_counter() - t0)
+    elapsed = time.perf_counter() - t0
+
+    fields = {
+        "status_code": r.status_code,
+        "etag": r.headers.get("ETag"),
+        "last_modified": r.headers.get("Last-Modified"),
+        "content_length": r.headers.get("Content-Length"),
+        "elapsed_s": elapsed,
+    }
+    if r.status_code == 304:
+        return ProbeResult(pipeline_id, UNCHANGED, "HTTP 304", **fields)
+    if r.status_code >= 400:
+        return ProbeResult(pipeline_id, ERROR, f"HTTP {r.status_code}", **fields)
+    status, reason = _compare_validators(state, r.headers)
+    return ProbeResult(pipeline_id, status, reason, **fields)
+
+
+def probe_all(
+    pipeline_ids: Optional[List[str]] = None,
+    *,
+    concurrency: int = 8,
+    client: Optional[DownloadClient] = None,
+    timeout: float = 15,
+    states: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> List[ProbeResult]:
+    """
+    Probe the sources of the registered pipelines (all of them by default) concurrently.
+
+    Reads only registry.json and the state store: no pipeline or extraction code is imported.
+    Per-host politeness still comes from the shared DownloadClient.
+    Returns one result per pipeline, in the order given.
+    """
+    registry = load_registry()
+    ids = list(registry) if pipeline_ids is None else list(pipeline_ids)
+    states = get_store().load_all() if states is None else states
+    client = client or get_client()
+
+    def one(pid: str) -> ProbeResult:
+        spec = registry.get(pid)
+        if spec is None or not spec.source_url:
+            return ProbeResult(pid, UNKNOWN, "not in registry.json")
+        return probe_source(pid, spec.source_url, states.get(pid, {}), client=client, timeout=timeout)
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as ex:
+        return list(ex.map(one, ids))
+
+
+def needs_run(results: List[ProbeResult]) -> List[str]:
+    """Pipelines worth running: changed upstream, or the probe could not tell."""
+    return [r.pipeline_id for r in results if r.status in (CHANGED, UNKNOWN, ERROR)]
+
+
+def format_probe(results: List[ProbeResult]) -> str:
+    """Plain-text table of pipeline / status / reason / time."""
+    rows = [(r.pipeline_id, r.status, r.reason, f"{r.elapsed_s:.2f}s") for r in results]
+    return format_table(rows, ("pipeline", "status", "reason", "time"))
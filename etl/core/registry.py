@@ -0,0 +1,86 @@
+# etl/core/registry.py
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from functools import lru_cache
+from importlib import import_module
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+# etl/pipelines/registry.json: one entry per pipeline, readable without importing any pipeline code
+REGISTRY_PATH = Path(__file__).resolve().parents[1] / "pipelines" / "registry.json"
+
+# how often a source publishes -> nominal days between releases
+CADENCES: Dict[str, int] = {"daily": 1, "weekly": 7, "monthly": 30, "quarterly": 91, "yearly": 365}
+
+
+@dataclass(frozen=True)
+class PipelineSpec:
+    id: str
+    display_name: str
+    source_url: str
+    cadence: str
+    pipeline: str   # entry point "package.module:Class"
+    extractor: str  # entry point "package.module:function" (file path -> DataFrame)
+    # the next period is expected release_lag_days after it ends, give or take release_window_days
+    release_lag_days: int = 30
+    release_window_days: int = 7
+
+    @property
+    def host(self) -> str:
+        return urlparse(self.source_url).netloc.lower()
+
+    @property
+    def cadence_days(self) -> int:
+        return CADENCES[self.cadence]
+
+
+def _spec(entry: Dict[str, Any]) -> PipelineSpec:
+    pid = entry["id"]
+    cadence = entry.get("cadence", "monthly")
+    if cadence not in CADENCES:
+        raise ValueError(f"{pid}: unknown cadence {cadence!r} (expected one of {sorted(CADENCES)})")
+    return PipelineSpec(
+        id=pid,
+        display_name=entry.get("display_name", pid),
+        source_url=entry.get("source_url", ""),
+        cadence=cadence,
+        pipeline=entry.get("pipeline", f"etl.pipelines.{pid}.pipeline:Pipeline"),
+        extractor=entry.get("extractor", ""),
+        release_lag_days=int(entry.get("release_lag_days", CADENCES[cadence] // 2)),
+        release_window_days=int(entry.get("release_window_days", 7)),
+    )
+
+
+@lru_cache(maxsize=None)
+def load_registry(path: Path = REGISTRY_PATH) -> Dict[str, PipelineSpec]:
+    """pipeline_id -> PipelineSpec, from the JSON manifest ({} if there is none)."""
+    if not path.exists():
+        return {}
+    data = json.loads(path.read_text(encoding="utf-8"))
+    specs = [_spec(e) for e in data.get("pipelines", [])]
+    return {s.id: s for s in sorted(specs, key=lambda s: s.id)}
+
+
+def get_spec(pipeline_id: str) -> Optional[PipelineSpec]:
+    return load_registry().get(pipeline_id)
+
+
+def resolve(entry_point: str) -> Any:
+    """Import "package.module:attr" and return attr (this is where heavy imports happen)."""
+    module, _, attr = entry_point.partition(":")
+    obj = import_module(module)
+    return getattr(obj, attr) if attr else obj
+
+
+def load_extractor(pipeline_id: str) -> Callable[..., Any]:
+    spec = get_spec(pipeline_id)
+    if spec is None or not spec.extractor:
+        raise KeyError(f"No extractor registered for pipeline {pipeline_id!r}")
+    return resolve(spec.extractor)
+
+
+def registered_ids() -> List[str]:
+    return list(load_registry())
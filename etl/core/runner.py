@@ -1,11 +1,22 @@
 ﻿# etl/core/runner.py
 from __future__ import annotations
 
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from importlib import import_module
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Callable, Dict, Any, List, Optional
+from urllib.parse import urlparse
 
-from etl.core.state import load_state, save_state
+from etl.core.metrics import METRICS_DIR, RunMetrics, export_run
+from etl.core.registry import get_spec, load_registry, resolve
+from etl.core.state import load_state, record_run, save_state
+from etl.core.textfmt import format_table
+
+LOG_DIR = Path("data/logs")
 
 
 def _pipelines_root() -> Path:
@@ -15,38 +26,195 @@ def _pipelines_root() -> Path:
 
 def list_pipelines() -> List[str]:
     """
-    Returns pipeline IDs based on folders under etl/pipelines/<pipeline_id>/pipeline.py
+    Returns pipeline IDs: the entries of etl/pipelines/registry.json, plus any folder
+    etl/pipelines/<pipeline_id>/pipeline.py that is not registered (yet).
     """
+    out: List[str] = list(load_registry())
     root = _pipelines_root()
     if not root.exists():
-        return []
+        return out
 
-    out: List[str] = []
     for d in sorted(root.iterdir()):
         if not d.is_dir():
             continue
         if d.name.startswith("__"):
             continue
-        if (d / "pipeline.py").exists():
+        if (d / "pipeline.py").exists() and d.name not in out:
             out.append(d.name)
-    return out
+    return sorted(out)
 
 
 def _load_pipeline(pipeline_id: str):
+    spec = get_spec(pipeline_id)
+    if spec is not None:
+        return resolve(spec.pipeline)()
     mod = import_module(f"etl.pipelines.{pipeline_id}.pipeline")
     return mod.Pipeline()
 
 
-def run_one(pipeline_id: str) -> None:
+def _source_host(pipeline_id: str) -> str:
+    # registered pipelines: straight from the manifest, without importing the pipeline
+    spec = get_spec(pipeline_id)
+    if spec is not None:
+        return spec.host
+    url = getattr(_load_pipeline(pipeline_id), "source_url", "")
+    return urlparse(url).netloc.lower() if url else ""
+
+
+def run_one(
+    pipeline_id: str,
+    *,
+    log: Callable[[str], None] = print,
+    trace_memory: bool = False,
+    metrics_dir: Optional[Path] = METRICS_DIR,
+) -> Dict[str, Any]:
+    """
+    Run a single pipeline, persist its state and append the run to the run history.
+
+    The pipeline gets a RunMetrics as `pipe.metrics` and records its stages on it;
+    the run (stages included) is exported to <metrics_dir>/runs.jsonl and
+    <metrics_dir>/<pipeline_id>.prom, failed runs too.
+    Returns a summary dict: pipeline_id, status, message, duration_s, stages.
+    """
     pipe = _load_pipeline(pipeline_id)
     state: Dict[str, Any] = load_state(pipeline_id)
+    metrics = RunMetrics(pipeline_id, trace_memory=trace_memory)
+    pipe.metrics = metrics
+
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+
+    log(f"\n=== Running pipeline: {pipeline_id} ===")
+    started_at = datetime.now(timezone.utc).isoformat()
+    t0 = time.perf_counter()
+    result: Any = None
+    error: Optional[str] = None
+    try:
+        result = pipe.run(state)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        duration = time.perf_counter() - t0
+        if started_tracing:
+            tracemalloc.stop()
+        if not isinstance(result, dict):
+            result = {}
+
+        status = "failed" if error else result.get("status", "unknown")
+        message = error or result.get("message")
+        if result.get("state") is not None:
+            save_state(pipeline_id, result["state"])
+        new_state = result.get("state") or state
+
+        record_run(
+            pipeline_id,
+            status=status,
+            started_at=started_at,
+            duration_s=duration,
+            file_sha256=new_state.get("file_sha256"),
+            data_sha256=new_state.get("data_sha256"),
+            rows_extracted=result.get("rows_extracted"),
+            rows_after=result.get("rows_after"),
+            message=message,
+        )
+        export_run(
+            {
+                **metrics.to_dict(),
+                "status": status,
+                "started_at": started_at,
+                "finished_ts": time.time(),
+                "duration_s": duration,
+            },
+            metrics_dir,
+        )
+
+    log(f"Status: {status}")
+    if message:
+        log(message)
+    for span in metrics.spans:
+        log(f"  {span.name:<12} {span.wall_s:8.3f}s wall {span.cpu_s:8.3f}s cpu")
+
+    return {
+        "pipeline_id": pipeline_id,
+        "status": status,
+        "message": message or "",
+        "duration_s": duration,
+        "stages": metrics.to_dict()["stages"],
+    }
+
+
+def run_many(
+    pipeline_ids: List[str],
+    *,
+    jobs: int = 4,
+    per_host: int = 2,
+    log_dir: Optional[Path] = LOG_DIR,
+    trace_memory: bool = False,
+    metrics_dir: Optional[Path] = METRICS_DIR,
+) -> List[Dict[str, Any]]:
+    """
+    Run pipelines in a thread pool.
+
+    - at most `jobs` pipelines run at once
+    - at most `per_host` of them hit the same source host at once
+    - each pipeline logs into its own buffer (and data/logs/<pipeline_id>.log);
+      buffers are printed as one block when the pipeline finishes, so output never interleaves
+    - a failing pipeline is reported as status "failed"; the others keep running
+    - trace_memory: tracemalloc runs for the whole batch (per-stage peaks overlap between threads)
+
+    Returns one summary dict per pipeline, in the order given.
+    """
+    host_locks: Dict[str, threading.BoundedSemaphore] = {}
+    host_locks_guard = threading.Lock()
+    print_lock = threading.Lock()
+
+    def host_sem(host: str) -> threading.BoundedSemaphore:
+        with host_locks_guard:
+            if host not in host_locks:
+                host_locks[host] = threading.BoundedSemaphore(max(1, per_host))
+            return host_locks[host]
+
+    def task(pipeline_id: str) -> Dict[str, Any]:
+        lines: List[str] = []
+        t0 = time.perf_counter()
+        try:
+            host = _source_host(pipeline_id)
+            with host_sem(host):
+                t0 = time.perf_counter()
+                out = run_one(pipeline_id, log=lines.append, trace_memory=trace_memory, metrics_dir=metrics_dir)
+        except Exception as e:
+            lines.append(f"FAILED: {type(e).__name__}: {e}")
+            out = {
+                "pipeline_id": pipeline_id,
+                "status": "failed",
+                "message": f"{type(e).__name__}: {e}",
+                "duration_s": time.perf_counter() - t0,
+                "stages": [],
+            }
+
+        if log_dir is not None:
+            log_dir.mkdir(parents=True, exist_ok=True)
+            (log_dir / f"{pipeline_id}.log").write_text("\n".join(lines).lstrip("\n") + "\n", encoding="utf-8")
+        with print_lock:
+            print("\n".join(lines))
+        return out
 
-    print(f"\n=== Running pipeline: {pipeline_id} ===")
-    result = pipe.run(state)
+    # one tracemalloc session for all threads (run_one only starts/stops it when not tracing)
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as ex:
+            futures = [ex.submit(task, pid) for pid in pipeline_ids]
+            return [f.result() for f in futures]
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
 
-    if isinstance(result, dict) and result.get("state") is not None:
-        save_state(pipeline_id, result["state"])
 
-    print(f"Status: {result.get('status', 'unknown')}")
-    if isinstance(result, dict) and result.get("message"):
-        print(result["message"])
+def format_summary(results: List[Dict[str, Any]]) -> str:
+    """Plain-text table of pipeline / status / duration."""
+    rows = [(r["pipeline_id"], r["status"], f'{r["duration_s"]:.1f}s') for r in results]
+    return format_table(rows, ("pipeline", "status", "duration"))
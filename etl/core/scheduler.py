@@ -0,0 +1,357 @@
+# etl/core/scheduler.py
+from __future__ import annotations
+
+import calendar
+import multiprocessing as mp
+import re
+import signal
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from etl.core.probe import needs_run, probe_all
+from etl.core.registry import PipelineSpec, load_registry
+from etl.core.state import get_store, record_run
+from etl.core.textfmt import format_table
+
+LOG_DIR = Path("data/logs")
+
+_PERIOD_RE = re.compile(r"^(\d{4})(?:-(Q[1-4]|\d{1,2}))?$")
+
+# ---- publication calendar ----
+
+
+def parse_period(period: str) -> Tuple[int, str, int]:
+    """"2024-Q3" -> (2024, "Q", 3); "2024-03" -> (2024, "M", 3); "2024" -> (2024, "Y", 1)."""
+    m = _PERIOD_RE.match(str(period).strip())
+    if not m:
+        raise ValueError(f"Unrecognised period: {period!r}")
+    year, part = int(m.group(1)), m.group(2)
+    if part is None:
+        return year, "Y", 1
+    if part.startswith("Q"):
+        return year, "Q", int(part[1])
+    return year, "M", int(part)
+
+
+def next_period_end(period: str) -> date:
+    """Last day of the period after `period` (the one whose release we are waiting for)."""
+    year, kind, n = parse_period(period)
+    if kind == "Y":
+        return date(year + 1, 12, 31)
+    months = 3 if kind == "Q" else 1
+    last_month = n * months + months  # last month of the next period, may run into next year
+    y, m = year + (last_month - 1) // 12, (last_month - 1) % 12 + 1
+    return date(y, m, calendar.monthrange(y, m)[1])
+
+
+def release_window(spec: PipelineSpec, latest_period: str) -> Tuple[datetime, datetime]:
+    """UTC window in which the period after latest_period is expected to be published."""
+    expected = datetime.combine(next_period_end(latest_period), datetime.min.time(), timezone.utc)
+    expected += timedelta(days=spec.release_lag_days)
+    half = timedelta(days=spec.release_window_days)
+    return expected - half, expected + half
+
+
+def next_poll(
+    now: float,
+    spec: PipelineSpec,
+    latest_period: Optional[str],
+    misses: int,
+    *,
+    hot_interval_s: float,
+    max_interval_s: float,
+) -> float:
+    """
+    Epoch time of the next probe:
+    - nothing delivered yet (no period): now, then backing off like below
+    - inside the release window: every hot_interval_s
+    - outside it: hot_interval_s * 2**misses, capped at max_interval_s, and never past
+      the start of the window
+    """
+    backoff = min(max_interval_s, hot_interval_s * (2 ** min(misses, 32)))
+    if not latest_period:
+        return now + backoff if misses else now
+    start, end = (d.timestamp() for d in release_window(spec, latest_period))
+    if start <= now <= end:
+        return now + hot_interval_s
+    if now < start:
+        return min(now + backoff, start)
+    return now + backoff  # overdue: keep looking, at a decreasing rate
+
+
+# ---- worker processes ----
+
+
+def _worker(pipeline_id: str, conn, log_dir: Optional[str]) -> None:
+    # runs in a child process; the pipeline (pandas & co.) is imported here, not in the daemon
+    from etl.core.runner import run_one
+
+    lines: List[str] = []
+    try:
+        out = run_one(pipeline_id, log=lines.append)
+    except Exception as e:
+        lines.append(f"FAILED: {type(e).__name__}: {e}")
+        out = {"pipeline_id": pipeline_id, "status": "failed", "message": f"{type(e).__name__}: {e}"}
+    if log_dir is not None:
+        p = Path(log_dir)
+        p.mkdir(parents=True, exist_ok=True)
+        (p / f"{pipeline_id}.log").write_text("\n".join(lines).lstrip("\n") + "\n", encoding="utf-8")
+    conn.send({k: out.get(k) for k in ("pipeline_id", "status", "message", "duration_s")})
+    conn.close()
+
+
+@dataclass
+class Job:
+    pipeline_id: str
+    process: Any
+    conn: Any
+    started: float
+    deadline: float
+
+
+@dataclass
+class Slot:
+    spec: PipelineSpec
+    next_due: float = 0.0
+    misses: int = 0      # probes in a row that found nothing new
+    failures: int = 0    # failed / timed-out runs in a row
+    last: Dict[str, Any] = field(default_factory=dict)
+
+
+class Scheduler:
+    """
+    Long-running scheduler for the registered pipelines.
+
+    - when to look: from each pipeline's cadence / release lag (registry.json) and the
+      latest_period_seen in its state, see next_poll(); failed runs back off the same way
+    - how to look: a conditional HEAD (etl.core.probe); only changed / undecidable sources
+      are run
+    - runs: one child process each, at most `workers` at once and `per_host` per source host;
+      a run still going after `deadline_s` is terminated (status "timeout"), cancel() stops
+      one on demand (status "cancelled"). A killed download resumes from its .part file.
+    """
+
+    def __init__(
+        self,
+        pipeline_ids: Optional[List[str]] = None,
+        *,
+        workers: int = 2,
+        per_host: int = 1,
+        deadline_s: float = 1800,
+        hot_interval_s: float = 3600,
+        max_interval_s: float = 86400,
+        log_dir: Optional[Path] = LOG_DIR,
+        clock: Callable[[], float] = time.time,
+        log: Callable[[str], None] = print,
+    ):
+        registry = load_registry()
+        ids = list(registry) if pipeline_ids is None else list(pipeline_ids)
+        missing = [pid for pid in ids if pid not in registry]
+        if missing:
+            raise KeyError(f"Not in registry.json: {', '.join(missing)}")
+        self.slots: Dict[str, Slot] = {pid: Slot(registry[pid]) for pid in ids}
+        self.workers = max(1, workers)
+        self.per_host = max(1, per_host)
+        self.deadline_s = deadline_s
+        self.hot_interval_s = hot_interval_s
+        self.max_interval_s = max_interval_s
+        self.log_dir = log_dir
+        self.clock = clock
+        self.log = log
+
+        self.jobs: Dict[str, Job] = {}
+        self.ready: List[str] = []  # probed as changed, waiting for a free worker / host slot
+        self._ctx = mp.get_context("spawn")  # no fork of a process that has probe threads
+        self._stop = threading.Event()
+
+    # ---- planning ----
+
+    def _latest_period(self, pipeline_id: str) -> Optional[str]:
+        return get_store().load(pipeline_id).get("latest_period_seen")
+
+    def _reschedule(self, pipeline_id: str, now: float) -> None:
+        slot = self.slots[pipeline_id]
+        due = next_poll(
+            now,
+            slot.spec,
+            self._latest_period(pipeline_id),
+            slot.misses,
+            hot_interval_s=self.hot_interval_s,
+            max_interval_s=self.max_interval_s,
+        )
+        if slot.failures:
+            # a failing run is retried with backoff even inside the release window
+            due = max(due, now + min(self.max_interval_s, self.hot_interval_s * 2 ** min(slot.failures, 32)))
+        slot.next_due = due
+
+    def plan(self) -> List[Dict[str, Any]]:
+        """Per pipeline: next probe time, release window and counters (for display)."""
+        out = []
+        for pid, slot in self.slots.items():
+            period = self._latest_period(pid)
+            window = release_window(slot.spec, period) if period else None
+            out.append({
+                "pipeline_id": pid,
+                "latest_period": period,
+                "window": window,
+                "next_due": datetime.fromtimestamp(slot.next_due, timezone.utc) if slot.next_due else None,
+                "misses": slot.misses,
+                "failures": slot.failures,
+                "running": pid in self.jobs,
+                "ready": pid in self.ready,
+            })
+        return out
+
+    # ---- jobs ----
+
+    def _start(self, pipeline_id: str, now: float) -> None:
+        parent, child = self._ctx.Pipe(duplex=False)
+        proc = self._ctx.Process(
+            target=_worker,
+            args=(pipeline_id, child, str(self.log_dir) if self.log_dir else None),
+            name=f"etl-{pipeline_id}",
+            daemon=True,
+        )
+        proc.start()
+        child.close()
+        self.jobs[pipeline_id] = Job(pipeline_id, proc, parent, now, now + self.deadline_s)
+        self.log(f"[scheduler] started {pipeline_id} (deadline {self.deadline_s:.0f}s)")
+
+    def _kill(self, job: Job) -> None:
+        job.process.terminate()
+        job.process.join(5)
+        if job.process.is_alive():
+            job.process.kill()
+            job.process.join()
+
+    def _finish(self, pipeline_id: str, now: float, status: str, message: str) -> None:
+        job = self.jobs.pop(pipeline_id)
+        job.conn.close()
+        slot = self.slots[pipeline_id]
+        slot.last = {"status": status, "message": message, "finished": now}
+        if status in ("failed", "timeout"):
+            slot.failures += 1
+        else:
+            slot.failures = 0
+            # a run that found nothing new counts like an empty probe
+            slot.misses = 0 if status == "delivered" else slot.misses + 1
+        self._reschedule(pipeline_id, now)
+        # never straight back to the source after a run (e.g. a delivery without a period)
+        slot.next_due = max(slot.next_due, now + self.hot_interval_s)
+        self.log(f"[scheduler] {pipeline_id}: {status} {message}".rstrip())
+
+    def cancel(self, pipeline_id: str, *, status: str = "cancelled", reason: str = "Cancelled.") -> bool:
+        """Terminate a running pipeline; recorded in the run history. False if it was not running."""
+        job = self.jobs.get(pipeline_id)
+        if job is None:
+            return False
+        self._kill(job)
+        now = self.clock()
+        # the child never reached run_one's own bookkeeping
+        record_run(
+            pipeline_id,
+            status=status,
+            started_at=datetime.fromtimestamp(job.started, timezone.utc).isoformat(),
+            duration_s=now - job.started,
+            message=reason,
+        )
+        self._finish(pipeline_id, now, status, reason)
+        return True
+
+    def _reap(self, now: float) -> None:
+        for pid, job in list(self.jobs.items()):
+            if job.conn.poll():
+                try:
+                    out = job.conn.recv()
+                except EOFError:
+                    out = {"status": "failed", "message": "worker exited without a result"}
+                job.process.join()
+                self._finish(pid, now, out.get("status") or "unknown", out.get("message") or "")
+            elif not job.process.is_alive():
+                job.process.join()
+                self._finish(pid, now, "failed", f"worker exited with code {job.process.exitcode}")
+            elif now >= job.deadline:
+                self.cancel(pid, status="timeout", reason=f"Deadline of {self.deadline_s:.0f}s exceeded.")
+
+    # ---- the loop ----
+
+    def tick(self) -> None:
+        """Reap finished / overdue runs, probe the due pipelines, start what changed."""
+        now = self.clock()
+        self._reap(now)
+
+        due = [
+            pid for pid, s in self.slots.items()
+            if s.next_due <= now and pid not in self.jobs and pid not in self.ready
+        ]
+        if due:
+            results = probe_all(due)
+            to_run = set(needs_run(results))
+            for r in results:
+                if r.pipeline_id in to_run:
+                    self.ready.append(r.pipeline_id)
+                else:
+                    self.slots[r.pipeline_id].misses += 1
+                    self._reschedule(r.pipeline_id, now)
+
+        hosts: Dict[str, int] = {}
+        for pid in self.jobs:
+            host = self.slots[pid].spec.host
+            hosts[host] = hosts.get(host, 0) + 1
+        for pid in list(self.ready):
+            host = self.slots[pid].spec.host
+            if len(self.jobs) >= self.workers:
+                break
+            if hosts.get(host, 0) >= self.per_host:
+                continue
+            hosts[host] = hosts.get(host, 0) + 1
+            self.ready.remove(pid)
+            self._start(pid, now)
+
+    def next_wakeup(self, tick_s: float) -> float:
+        """Seconds to sleep: until the next due probe, at most tick_s while runs are going."""
+        now = self.clock()
+        pending = [s.next_due for pid, s in self.slots.items() if pid not in self.jobs and pid not in self.ready]
+        wait = min(pending) - now if pending else tick_s
+        if self.jobs:
+            wait = min(wait, tick_s)
+        return max(0.0, min(wait, self.max_interval_s))
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def run_forever(self, *, tick_s: float = 5.0) -> None:
+        """Loop until stop() / SIGINT / SIGTERM; runs still going are then cancelled."""
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, lambda *_: self.stop())
+        try:
+            while not self._stop.is_set():
+                self.tick()
+                self._stop.wait(max(self.next_wakeup(tick_s), 0.1))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            for pid in list(self.jobs):
+                self.cancel(pid, reason="Scheduler stopped.")
+
+
+def format_plan(plan: List[Dict[str, Any]]) -> str:
+    """Plain-text table of pipeline / latest period / release window / next probe."""
+
+    def ts(d: Optional[datetime]) -> str:
+        return d.strftime("%Y-%m-%d %H:%M") if d else "-"
+
+    rows = [
+        (
+            p["pipeline_id"],
+            p["latest_period"] or "-",
+            f"{ts(p['window'][0])} .. {ts(p['window'][1])}" if p["window"] else "-",
+            "running" if p["running"] else "ready" if p["ready"] else ts(p["next_due"]) if p["next_due"] else "now",
+        )
+        for p in plan
+    ]
+    return format_table(rows, ("pipeline", "latest", "release window (UTC)", "next probe"))
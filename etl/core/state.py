@@ -1,17 +1,235 @@
-﻿import json
+﻿# etl/core/state.py
+from __future__ import annotations
+
+import json
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Callable, Dict, Iterator, List, Optional
 
 STATE_DIR = Path("data/state")
+STATE_DB = STATE_DIR / "state.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pipeline_state (
+    pipeline_id TEXT PRIMARY KEY,
+    state_json  TEXT NOT NULL,
+    updated_at  TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS run_history (
+    run_id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    pipeline_id    TEXT NOT NULL,
+    started_at     TEXT NOT NULL,
+    finished_at    TEXT NOT NULL,
+    status         TEXT NOT NULL,
+    duration_s     REAL,
+    file_sha256    TEXT,
+    data_sha256    TEXT,
+    rows_extracted INTEGER,
+    rows_after     INTEGER,
+    message        TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_run_pipeline ON run_history (pipeline_id, finished_at);
+CREATE INDEX IF NOT EXISTS ix_run_status ON run_history (status, pipeline_id, finished_at);
+"""
+
+
+def utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class SqliteDb:
+    """
+    One SQLite file in WAL mode, created from SCHEMA on first use, with connect() for
+    one-transaction access. StateStore and the change log (etl.core.changelog) build on it.
+    """
+
+    SCHEMA = ""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        con = sqlite3.connect(self.path, timeout=30)
+        try:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.executescript(self.SCHEMA)
+        finally:
+            con.close()
+
+    @contextmanager
+    def connect(self, *, write: bool = True) -> Iterator[sqlite3.Connection]:
+        """One transaction: commit on success, rollback on error, always close."""
+        # writers take the lock up front (BEGIN IMMEDIATE), so concurrent read-modify-write
+        # updates queue up instead of failing mid-way; readers never block under WAL
+        con = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            con.execute("BEGIN IMMEDIATE" if write else "BEGIN")
+            try:
+                yield con
+            except BaseException:
+                con.execute("ROLLBACK")
+                raise
+            con.execute("COMMIT")
+        finally:
+            con.close()
+
+
+class StateStore(SqliteDb):
+    """
+    Pipeline state + run history in one SQLite database (data/state/state.sqlite).
+
+    - pipeline_state: one row per pipeline, the state dict as JSON; every write is a
+      single transaction, so a crash never leaves a half-written state behind
+    - run_history: append-only, one row per run (status, duration, hashes, row counts)
+    - legacy data/state/<pipeline_id>.json files are imported on first load
+    """
+
+    SCHEMA = _SCHEMA
+
+    def __init__(self, path: Path = STATE_DB, *, legacy_dir: Optional[Path] = STATE_DIR):
+        self.legacy_dir = Path(legacy_dir) if legacy_dir is not None else None
+        super().__init__(path)
+
+    # ---- state ----
+
+    def _legacy_state(self, pipeline_id: str) -> Optional[Dict[str, Any]]:
+        if self.legacy_dir is None:
+            return None
+        p = self.legacy_dir / f"{pipeline_id}.json"
+        if not p.exists():
+            return None
+        return json.loads(p.read_text(encoding="utf-8"))
+
+    def load(self, pipeline_id: str) -> Dict[str, Any]:
+        with self.connect() as con:
+            row = con.execute(
+                "SELECT state_json FROM pipeline_state WHERE pipeline_id = ?", (pipeline_id,)
+            ).fetchone()
+            if row is not None:
+                return json.loads(row[0])
+
+            legacy = self._legacy_state(pipeline_id)
+            if legacy is None:
+                return {}
+            self._write(con, pipeline_id, legacy)
+            return legacy
+
+    @staticmethod
+    def _write(con: sqlite3.Connection, pipeline_id: str, state: Dict[str, Any]) -> None:
+        con.execute(
+            "INSERT INTO pipeline_state (pipeline_id, state_json, updated_at) VALUES (?, ?, ?) "
+            "ON CONFLICT (pipeline_id) DO UPDATE SET state_json = excluded.state_json, "
+            "updated_at = excluded.updated_at",
+            (pipeline_id, json.dumps(state, ensure_ascii=False), utc_now()),
+        )
+
+    def save(self, pipeline_id: str, state: Dict[str, Any]) -> None:
+        with self.connect() as con:
+            self._write(con, pipeline_id, state)
+
+    def update(self, pipeline_id: str, fn: Callable[[Dict[str, Any]], Dict[str, Any]]) -> Dict[str, Any]:
+        """Atomic read-modify-write: new_state = fn(current_state), under the write lock."""
+        with self.connect() as con:
+            row = con.execute(
+                "SELECT state_json FROM pipeline_state WHERE pipeline_id = ?", (pipeline_id,)
+            ).fetchone()
+            current = json.loads(row[0]) if row else (self._legacy_state(pipeline_id) or {})
+            new_state = fn(dict(current))
+            self._write(con, pipeline_id, new_state)
+        return new_state
+
+    def load_all(self) -> Dict[str, Dict[str, Any]]:
+        """Every pipeline's state in one query (dashboards)."""
+        with self.connect(write=False) as con:
+            rows = con.execute("SELECT pipeline_id, state_json FROM pipeline_state ORDER BY pipeline_id").fetchall()
+        return {pid: json.loads(js) for pid, js in rows}
+
+    # ---- run history ----
+
+    def record_run(
+        self,
+        pipeline_id: str,
+        *,
+        status: str,
+        started_at: str,
+        finished_at: Optional[str] = None,
+        duration_s: Optional[float] = None,
+        file_sha256: Optional[str] = None,
+        data_sha256: Optional[str] = None,
+        rows_extracted: Optional[int] = None,
+        rows_after: Optional[int] = None,
+        message: Optional[str] = None,
+    ) -> int:
+        """Append one run to run_history. Returns its run_id."""
+        with self.connect() as con:
+            cur = con.execute(
+                "INSERT INTO run_history (pipeline_id, started_at, finished_at, status, duration_s, "
+                "file_sha256, data_sha256, rows_extracted, rows_after, message) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    pipeline_id, started_at, finished_at or utc_now(), status, duration_s,
+                    file_sha256, data_sha256, rows_extracted, rows_after, message,
+                ),
+            )
+            return int(cur.lastrowid)
+
+    def runs(self, pipeline_id: Optional[str] = None, *, limit: int = 50) -> List[Dict[str, Any]]:
+        """Most recent runs first (optionally for one pipeline)."""
+        sql = "SELECT * FROM run_history"
+        params: tuple = ()
+        if pipeline_id is not None:
+            sql += " WHERE pipeline_id = ?"
+            params = (pipeline_id,)
+        sql += " ORDER BY finished_at DESC, run_id DESC LIMIT ?"
+        with self.connect(write=False) as con:
+            con.row_factory = sqlite3.Row
+            rows = con.execute(sql, params + (limit,)).fetchall()
+        return [dict(r) for r in rows]
+
+    def last_delivered(self) -> Dict[str, str]:
+        """pipeline_id -> finished_at of its last delivered run."""
+        with self.connect(write=False) as con:
+            rows = con.execute(
+                "SELECT pipeline_id, MAX(finished_at) FROM run_history "
+                "WHERE status = 'delivered' GROUP BY pipeline_id"
+            ).fetchall()
+        return dict(rows)
+
+    def not_delivered_since(self, days: float, pipeline_ids: Optional[List[str]] = None) -> Dict[str, Optional[str]]:
+        """
+        Pipelines with no delivered run in the last `days` days -> their last delivery (None = never).
+        Without pipeline_ids, every pipeline that has state or history is checked.
+        """
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+        last = self.last_delivered()
+        if pipeline_ids is None:
+            with self.connect(write=False) as con:
+                known = con.execute(
+                    "SELECT pipeline_id FROM pipeline_state UNION SELECT pipeline_id FROM run_history"
+                ).fetchall()
+            pipeline_ids = sorted(r[0] for r in known)
+        return {pid: last.get(pid) for pid in pipeline_ids if last.get(pid) is None or last[pid] < cutoff}
+
+
+_store: Optional[StateStore] = None
+
+
+def get_store() -> StateStore:
+    """Process-wide StateStore on data/state/state.sqlite."""
+    global _store
+    if _store is None or _store.path != STATE_DB:
+        _store = StateStore(STATE_DB)
+    return _store
+
 
 def load_state(pipeline_id: str) -> Dict[str, Any]:
-    STATE_DIR.mkdir(parents=True, exist_ok=True)
-    p = STATE_DIR / f"{pipeline_id}.json"
-    if not p.exists():
-        return {}
-    return json.loads(p.read_text(encoding="utf-8"))
+    return get_store().load(pipeline_id)
+
 
 def save_state(pipeline_id: str, state: Dict[str, Any]) -> None:
-    STATE_DIR.mkdir(parents=True, exist_ok=True)
-    p = STATE_DIR / f"{pipeline_id}.json"
-    p.write_text(json.dumps(state, indent=2, ensure_ascii=False), encoding="utf-8")
+    get_store().save(pipeline_id, state)
+
+
+def record_run(pipeline_id: str, **kwargs) -> int:
+    return get_store().record_run(pipeline_id, **kwargs)
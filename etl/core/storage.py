@@ -0,0 +1,193 @@
+# etl/core/storage.py
+from __future__ import annotations
+
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+def _q(name: str) -> str:
+    """Quote an SQL identifier (our column names contain spaces)."""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _sql_type(dtype) -> str:
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(dtype):
+        return "REAL"
+    return "TEXT"
+
+
+def _rows(df: pd.DataFrame) -> List[tuple]:
+    """Row tuples of plain Python values sqlite3 can bind (numpy scalars unwrapped, NA -> None)."""
+    cols = []
+    for c in df.columns:
+        s = df[c]
+        vals = s.tolist()  # numpy / extension dtypes -> int, float, bool
+        if s.dtype == object:
+            vals = [v.item() if isinstance(v, np.generic) else v for v in vals]
+        for i in np.flatnonzero(s.isna().to_numpy()):
+            vals[i] = None
+        cols.append(vals)
+    return list(zip(*cols))
+
+
+class SqliteStore:
+    """
+    Keyed table storage for pipeline data ("the DB"), one SQLite file for many datasets.
+
+    - one table per dataset, PRIMARY KEY on the key columns
+    - upsert(): INSERT ... ON CONFLICT DO UPDATE, only for the rows you pass
+    - read(): optionally only a period range, e.g. (2023, 6) .. (2024, 3) on ["Year", "Month"]
+    - export_csv() / export_excel(): produce deliverables as a separate step
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    @contextmanager
+    def connect(self) -> Iterator[sqlite3.Connection]:
+        """One transaction: commit on success, rollback on error, always close."""
+        con = sqlite3.connect(self.path)
+        try:
+            con.execute("PRAGMA journal_mode=WAL")
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    def has_table(self, table: str) -> bool:
+        with self.connect() as con:
+            row = con.execute(
+                "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table,)
+            ).fetchone()
+        return row is not None
+
+    def columns(self, table: str) -> Dict[str, str]:
+        """Column name -> declared SQLite type, in table order."""
+        with self.connect() as con:
+            info = con.execute(f"PRAGMA table_info({_q(table)})").fetchall()
+        return {r[1]: r[2] for r in info}
+
+    def ensure_table(self, table: str, df: pd.DataFrame, key_cols: Sequence[str]) -> None:
+        """Create the table from df's columns/dtypes if missing; add new columns if any."""
+        with self.connect() as con:
+            exists = con.execute(
+                "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table,)
+            ).fetchone()
+            if not exists:
+                cols = ", ".join(f"{_q(c)} {_sql_type(df[c].dtype)}" for c in df.columns)
+                pk = ", ".join(_q(c) for c in key_cols)
+                con.execute(f"CREATE TABLE {_q(table)} ({cols}, PRIMARY KEY ({pk}))")
+                return
+
+            have = {r[1] for r in con.execute(f"PRAGMA table_info({_q(table)})").fetchall()}
+            for c in df.columns:
+                if c not in have:
+                    con.execute(f"ALTER TABLE {_q(table)} ADD COLUMN {_q(c)} {_sql_type(df[c].dtype)}")
+
+    def upsert(self, table: str, df: pd.DataFrame, key_cols: Sequence[str]) -> int:
+        """Insert new keys / overwrite existing keys with the rows of df. Returns rows written."""
+        if df.empty:
+            return 0
+        self.ensure_table(table, df, key_cols)
+
+        cols = list(df.columns)
+        val_cols = [c for c in cols if c not in key_cols]
+        col_sql = ", ".join(_q(c) for c in cols)
+        params = ", ".join("?" for _ in cols)
+        conflict = ", ".join(_q(c) for c in key_cols)
+        if val_cols:
+            action = "DO UPDATE SET " + ", ".join(f"{_q(c)}=excluded.{_q(c)}" for c in val_cols)
+        else:
+            action = "DO NOTHING"
+
+        sql = f"INSERT INTO {_q(table)} ({col_sql}) VALUES ({params}) ON CONFLICT ({conflict}) {action}"
+        with self.connect() as con:
+            con.executemany(sql, _rows(df))
+        return len(df)
+
+    def read(
+        self,
+        table: str,
+        *,
+        period_cols: Optional[Sequence[str]] = None,
+        start: Optional[Sequence[Any]] = None,
+        end: Optional[Sequence[Any]] = None,
+        order_by: Optional[Sequence[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        Read a table (or only the periods start..end, inclusive, compared as tuples on period_cols).
+        INTEGER columns come back as Int64 so NULLs do not turn them into floats.
+        """
+        types = self.columns(table)
+        if not types:
+            raise KeyError(f"Table not found in {self.path}: {table}")
+
+        where: List[str] = []
+        args: List[Any] = []
+        if period_cols and (start is not None or end is not None):
+            row = "(" + ", ".join(_q(c) for c in period_cols) + ")"
+            marks = "(" + ", ".join("?" for _ in period_cols) + ")"
+            if start is not None:
+                where.append(f"{row} >= {marks}")
+                args.extend(start)
+            if end is not None:
+                where.append(f"{row} <= {marks}")
+                args.extend(end)
+
+        sql = f"SELECT * FROM {_q(table)}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        if order_by:
+            sql += " ORDER BY " + ", ".join(_q(c) for c in order_by)
+
+        with self.connect() as con:
+            df = pd.read_sql_query(sql, con, params=args)
+
+        for c, t in types.items():
+            if t == "INTEGER" and c in df.columns:
+                df[c] = pd.to_numeric(df[c], errors="coerce").astype("Int64")
+        return df
+
+    def first_period(self, table: str, period_cols: Sequence[str]) -> Optional[tuple]:
+        """Smallest period tuple in the table (None if empty)."""
+        cols = ", ".join(_q(c) for c in period_cols)
+        with self.connect() as con:
+            row = con.execute(f"SELECT {cols} FROM {_q(table)} ORDER BY {cols} LIMIT 1").fetchone()
+        return tuple(row) if row else None
+
+    def export_csv(self, table: str, out_path: Path, *, order_by: Optional[Sequence[str]] = None) -> Path:
+        out_path = Path(out_path)
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        self.read(table, order_by=order_by).to_csv(out_path, index=False)
+        return out_path
+
+    def export_excel(
+        self,
+        table: str,
+        out_path: Path,
+        *,
+        sheet: str = "Sheet1",
+        order_by: Optional[Sequence[str]] = None,
+    ) -> Path:
+        out_path = Path(out_path)
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        self.read(table, order_by=order_by).to_excel(out_path, sheet_name=sheet, index=False)
+        return out_path
+
+
+def open_store(path: Path) -> SqliteStore:
+    """
+    Storage backend factory (by file suffix). Only SQLite for now; other backends
+    (e.g. partitioned Parquet) plug in here with the same methods.
+    """
+    path = Path(path)
+    if path.suffix.lower() in (".sqlite", ".sqlite3", ".db"):
+        return SqliteStore(path)
+    raise ValueError(f"Unsupported storage backend for: {path}")
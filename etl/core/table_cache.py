@@ -0,0 +1,56 @@
+# etl/core/table_cache.py
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from etl.core.disk_cache import DiskCache
+
+CACHE_DIR = Path("data/cache/pdf_tables")
+
+# bump when the stored format changes
+CACHE_VERSION = 1
+
+
+class TableCache(DiskCache):
+    """
+    On-disk cache of raw PDF page tables (what pdfplumber's extract_tables returns),
+    keyed by file SHA-256 + page index + extraction settings.
+
+    - one small JSON file per (file, page, settings)
+    - a hit refreshes the file's mtime; put() evicts least-recently-used entries
+      until the cache is under max_bytes
+    """
+
+    ENTRY_GLOBS = ("*/*.json",)
+
+    def __init__(self, root: Path = CACHE_DIR, *, max_bytes: int = 256 * 1024 * 1024):
+        super().__init__(root, max_bytes=max_bytes)
+
+    @staticmethod
+    def key(file_sha256: str, page: int, settings: Optional[Dict[str, Any]] = None) -> str:
+        payload = json.dumps(
+            {"v": CACHE_VERSION, "file": file_sha256, "page": page, "settings": settings or {}},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def get(self, file_sha256: str, page: int, settings: Optional[Dict[str, Any]] = None) -> Optional[List[Any]]:
+        p = self._path(self.key(file_sha256, page, settings))
+        try:
+            tables = json.loads(p.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return None
+        self._touch(p)
+        return tables
+
+    def put(self, file_sha256: str, page: int, tables: List[Any], settings: Optional[Dict[str, Any]] = None) -> None:
+        p = self._path(self.key(file_sha256, page, settings))
+        self._write_atomic(p, json.dumps(tables, ensure_ascii=False).encode("utf-8"))
+        self.evict()
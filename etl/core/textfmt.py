@@ -0,0 +1,15 @@
+# etl/core/textfmt.py
+from __future__ import annotations
+
+from typing import Any, Sequence
+
+
+def format_table(rows: Sequence[Sequence[Any]], cols: Sequence[str]) -> str:
+    """Plain-text table: a header row, a dashed rule, then rows as left-aligned padded columns."""
+    cells = [tuple(str(v) for v in row) for row in rows]
+    widths = [max([len(c)] + [len(row[i]) for row in cells]) for i, c in enumerate(cols)]
+
+    def fmt(row) -> str:
+        return "  ".join(v.ljust(w) for v, w in zip(row, widths)).rstrip()
+
+    return "\n".join([fmt(cols), fmt(tuple("-" * w for w in widths))] + [fmt(row) for row in cells])
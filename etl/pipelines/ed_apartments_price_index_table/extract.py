@@ -1,168 +1,144 @@
-﻿import re
-from pathlib import Path
-from typing import Dict, Tuple
+﻿from pathlib import Path
+from typing import Dict, Optional, Tuple
 
+import numpy as np
 import pandas as pd
-import pdfplumber
+
+from etl.core.normalize import to_numeric
+from etl.core.pdf import load_first_tables
 
 QNUM = {"I": 1, "II": 2, "III": 3, "IV": 4}
 
-def norm_q(s: str) -> str:
-    s = str(s).strip().replace("*", "")
-    s = s.replace("ΙII", "III").replace("ΙV", "IV").replace("Ι", "I")
-    return s
-
-def to_float(x):
-    if x is None:
-        return None
-    s = str(x).strip()
-    if s in ("", "", "...", ""):
-        return None
-    s = s.replace(",", ".")
-    try:
-        return float(s)
-    except ValueError:
-        return None
-
-def parse_year_quarter(cell, current_year):
-    if cell is None:
-        return None
-    s = str(cell).strip()
-    if not s:
-        return None
-    if s.startswith("Πηγή") or s.startswith("Source"):
-        return ("STOP", None)
-
-    s = s.replace("ΙII", "III").replace("ΙV", "IV").replace("Ι", "I")
-
-    if re.fullmatch(r"\d{4}", s):
-        return ("YEAR_ONLY", int(s))
-
-    m = re.match(r"^(\d{4})\s+(I|II|III|IV)\*?$", s)
-    if m:
-        y = int(m.group(1))
-        q = QNUM.get(norm_q(m.group(2)))
-        return (y, q) if q else None
-
-    m = re.match(r"^(I|II|III|IV)\*?$", s)
-    if m and current_year is not None:
-        q = QNUM.get(norm_q(m.group(1)))
-        return (current_year, q) if q else None
-
-    return None
-
-def normalize_table(table):
-    maxlen = max(len(r) for r in table)
-    norm = [r + [None] * (maxlen - len(r)) for r in table]
-    return pd.DataFrame(norm)
+# Pages 1-4 of the BoG file: II.6 (Greece), II.7 (total by area), II.7.1 (new), II.7.2 (old)
+PAGES = (0, 1, 2, 3)
 
 def load_page_table1(pdf_path: Path, page_idx: int) -> pd.DataFrame:
-    with pdfplumber.open(str(pdf_path)) as pdf:
-        page = pdf.pages[page_idx]
-        tables = page.extract_tables() or []
-        if not tables:
-            raise RuntimeError(f"No tables found on page {page_idx+1}")
-        return normalize_table(tables[0])
+    return load_first_tables(pdf_path, [page_idx])[page_idx]
+
+GEO_REGIONS = ["Athens", "Thessaloniki", "Other Cities", "Other Areas"]
+VALUE_NAMES = ["Index", "Up To 5 Years Old Index", "Over 5 Years Old Index"]
+
+# "2010", "2010 I", "2010 IV*" or a bare "II" (year carried from the rows above)
+_YQ_RE = r"^(?:(?P<year>\d{4})(?:\s+(?P<q1>I|II|III|IV)\*?)?|(?P<q2>I|II|III|IV)\*?)$"
+
+def classify_year_quarter(col: pd.Series) -> pd.DataFrame:
+    """
+    Parse a whole first column at once: "2010 I" rows, and bare "II" rows that take the
+    year from the rows above (the "*" of provisional quarters is ignored).
+    Returns Year/Quarter (Int64) per row, NA where the row is not a quarter row;
+    rows from the first "Source"/"Πηγή" line on are cut off (the STOP rule).
+    """
+    s = col.astype("string").str.strip()
+    stop = s.str.startswith("Πηγή", na=False) | s.str.startswith("Source", na=False)
+    if stop.any():
+        s = s.iloc[: int(stop.to_numpy().argmax())]
+
+    s = (
+        s.str.replace("ΙII", "III", regex=False)
+        .str.replace("ΙV", "IV", regex=False)
+        .str.replace("Ι", "I", regex=False)
+    )
+    m = s.str.extract(_YQ_RE)
+
+    # every row that names a year (with or without quarter) becomes the current year
+    year = pd.to_numeric(m["year"], errors="coerce").ffill()
+    q = m["q1"].fillna(m["q2"]).map(QNUM)
+
+    ok = q.notna() & year.notna()
+    return pd.DataFrame({
+        "Year": year.where(ok).astype("Int64"),
+        "Quarter": q.where(ok).astype("Int64"),
+    }, index=s.index)
+
+def numeric_cells(df: pd.DataFrame, min_cols: int = 0) -> np.ndarray:
+    """Every cell right of the first column as float, in one pass (decimal comma; NaN = not a number)."""
+    vals = df.iloc[:, 1:]
+    out = np.column_stack([
+        to_numeric(vals[c].astype(object), decimal=",", thousands=None).to_numpy(dtype="float64", na_value=np.nan)
+        for c in vals.columns
+    ]) if vals.shape[1] else np.empty((len(df), 0))
+    if out.shape[1] < min_cols:
+        out = np.hstack([out, np.full((len(df), min_cols - out.shape[1]), np.nan)])
+    return out
 
-def parse_ii6_greece(df: pd.DataFrame) -> pd.DataFrame:
-    rows = []
-    current_year = None
-
-    for _, row in df.iterrows():
-        pq = parse_year_quarter(row.iloc[0], current_year)
-        if pq is None:
-            continue
-        if pq[0] == "STOP":
-            break
-        if pq[0] == "YEAR_ONLY":
-            current_year = pq[1]
-            continue
-
-        y, qn = pq
-        current_year = y
-
-        total = to_float(row.iloc[1]) if len(row) > 1 else None
-        new5  = to_float(row.iloc[4]) if len(row) > 4 else None
-        old5  = to_float(row.iloc[7]) if len(row) > 7 else None
-
-        if None in (total, new5, old5):
-            tokens = [to_float(x) for x in row.tolist()[1:] if to_float(x) is not None]
-            if len(tokens) >= 7:
-                total, new5, old5 = tokens[0], tokens[3], tokens[6]
-
-        if None not in (total, new5, old5):
-            rows.append({
-                "Year": y,
-                "Quarter": qn,
-                "Region": "Greece",
-                "Index": total,
-                "Up To 5 Years Old Index": new5,
-                "Over 5 Years Old Index": old5,
-            })
-
-    return pd.DataFrame(rows)
+def _token_fallback(row: np.ndarray, positions: Tuple[int, ...]) -> np.ndarray:
+    # the numbers of the row in order, skipping blanks/footnote cells
+    tokens = row[~np.isnan(row)]
+    return np.array([tokens[i] if len(tokens) > i else np.nan for i in positions])
 
-def parse_geo_table(df: pd.DataFrame) -> Dict[Tuple[int, int, str], float]:
-    out: Dict[Tuple[int, int, str], float] = {}
-    current_year = None
-    regions = ["Athens", "Thessaloniki", "Other Cities", "Other Areas"]
-
-    for _, row in df.iterrows():
-        pq = parse_year_quarter(row.iloc[0], current_year)
-        if pq is None:
-            continue
-        if pq[0] == "STOP":
-            break
-        if pq[0] == "YEAR_ONLY":
-            current_year = pq[1]
-            continue
-
-        y, qn = pq
-        current_year = y
-
-        vals = None
-        if len(row) >= 11:
-            vals = [to_float(row.iloc[i]) for i in (1, 4, 7, 10)]
-
-        if vals is None or any(v is None for v in vals):
-            tokens = [to_float(x) for x in row.tolist()[1:] if to_float(x) is not None]
-            vals = []
-            for idx in (0, 3, 6, 9):
-                vals.append(tokens[idx] if len(tokens) > idx else None)
-
-        for rname, v in zip(regions, vals):
-            if v is not None:
-                out[(y, qn, rname)] = v
+def _quarter_rows(df: pd.DataFrame, positions: Tuple[int, ...], min_cols: int):
+    """Year/Quarter + the values at `positions` (0-based, after the first column) for quarter rows."""
+    yq = classify_year_quarter(df.iloc[:, 0])
+    ok = yq["Year"].notna().to_numpy()
+    idx = yq.index[ok]
+    width = df.shape[1] - 1
+
+    cells = numeric_cells(df.loc[idx], min_cols=max(positions) + 1)
+    if width >= min_cols:
+        vals = cells[:, list(positions)]
+    else:
+        vals = np.full((len(idx), len(positions)), np.nan)
+
+    # positional/token fallback only for rows with gaps at the expected positions
+    for i in np.flatnonzero(np.isnan(vals).any(axis=1)):
+        vals[i] = _token_fallback(cells[i], positions)
 
+    return yq.loc[idx].reset_index(drop=True), vals
+
+def parse_ii6_greece(df: pd.DataFrame) -> pd.DataFrame:
+    yq, vals = _quarter_rows(df, (0, 3, 6), min_cols=1)
+
+    # positional values need cols 1/4/7; a row with fewer than 7 tokens stays incomplete
+    complete = ~np.isnan(vals).any(axis=1)
+    out = yq[complete].astype("int64").reset_index(drop=True)
+    out["Region"] = "Greece"
+    for name, col in zip(VALUE_NAMES, vals[complete].T):
+        out[name] = col
     return out
 
-def extract_apartment_indices(pdf_path: Path) -> pd.DataFrame:
-    df_ii6  = load_page_table1(pdf_path, 0)
-    df_ii7  = load_page_table1(pdf_path, 1)
-    df_ii71 = load_page_table1(pdf_path, 2)
-    df_ii72 = load_page_table1(pdf_path, 3)
+def parse_geo_frame(df: pd.DataFrame, value_name: str = "Value") -> pd.DataFrame:
+    """II.7-style table (4 regions x 3 sub-columns) -> long frame Year, Quarter, Region, value_name."""
+    yq, vals = _quarter_rows(df, (0, 3, 6, 9), min_cols=10)
+
+    parts = []
+    for region, col in zip(GEO_REGIONS, vals.T):
+        part = yq.copy()
+        part["Region"] = region
+        part[value_name] = col
+        parts.append(part)
+    out = pd.concat(parts, ignore_index=True).dropna(subset=[value_name])
+    out[["Year", "Quarter"]] = out[["Year", "Quarter"]].astype("int64")
+    # same key twice in a table: the later row wins (as with the old dict)
+    return out.drop_duplicates(["Year", "Quarter", "Region"], keep="last").reset_index(drop=True)
+
+def parse_geo_table(df: pd.DataFrame) -> Dict[Tuple[int, int, str], float]:
+    geo = parse_geo_frame(df)
+    return {
+        (int(y), int(q), r): float(v)
+        for y, q, r, v in geo[["Year", "Quarter", "Region", "Value"]].itertuples(index=False, name=None)
+    }
+
+def extract_apartment_indices(
+    pdf_path: Path,
+    *,
+    processes: Optional[int] = None,
+    file_sha256: Optional[str] = None,
+) -> pd.DataFrame:
+    # open the PDF once for all four pages (optionally spread over processes);
+    # with file_sha256 the raw tables are reused from the on-disk table cache
+    tables = load_first_tables(pdf_path, PAGES, processes=processes, file_sha256=file_sha256)
+    df_ii6, df_ii7, df_ii71, df_ii72 = (tables[i] for i in PAGES)
 
     greece_df = parse_ii6_greece(df_ii6)
 
-    total_map = parse_geo_table(df_ii7)
-    new_map   = parse_geo_table(df_ii71)
-    old_map   = parse_geo_table(df_ii72)
-
-    rows = greece_df.to_dict("records")
-
-    for key, total in total_map.items():
-        if key in new_map and key in old_map:
-            y, qn, region = key
-            rows.append({
-                "Year": y,
-                "Quarter": qn,
-                "Region": str(region).strip(),
-                "Index": total,
-                "Up To 5 Years Old Index": new_map[key],
-                "Over 5 Years Old Index": old_map[key],
-            })
-
-    df = pd.DataFrame(rows)
+    keys = ["Year", "Quarter", "Region"]
+    geo_df = (
+        parse_geo_frame(df_ii7, VALUE_NAMES[0])
+        .merge(parse_geo_frame(df_ii71, VALUE_NAMES[1]), on=keys, how="inner")
+        .merge(parse_geo_frame(df_ii72, VALUE_NAMES[2]), on=keys, how="inner")
+    )
+
+    df = pd.concat([greece_df, geo_df[keys + VALUE_NAMES]], ignore_index=True)
     df["Region"] = df["Region"].astype(str).str.strip()
     df = df.sort_values(["Year", "Quarter", "Region"]).reset_index(drop=True)
     return df
@@ -4,12 +4,36 @@ from __future__ import annotations
 from pathlib import Path
 import pandas as pd
 
+from etl.core.excel_reader import Row, read_sheet
+from etl.core.normalize import is_text, to_numeric
 
-def _engine_for(path: Path) -> str:
-    ext = path.suffix.lower()
-    if ext == ".xls":
-        return "xlrd"
-    return "openpyxl"
+
+COLUMNS = ["Year", "Month", "Permits Number", "Area", "Volume"]
+VALUE_COLS = ["Permits Number", "Area", "Volume"]
+
+# how far down the sheet we look for the header row
+HEADER_SEARCH_ROWS = 80
+
+
+def _find_header_row(df: pd.DataFrame) -> int:
+    """Index of the first row that mentions "Year" and "Month"/"Μήνας" (fallback: 6)."""
+    head = df.iloc[:HEADER_SEARCH_ROWS].astype(str)
+    has_year = pd.Series(False, index=head.index)
+    has_month = pd.Series(False, index=head.index)
+    for c in head.columns:
+        col = head[c]
+        has_year |= col.str.contains("Year", case=False, na=False)
+        has_month |= col.str.contains("Month|Μήνας", case=False, na=False, regex=True)
+
+    hits = (has_year & has_month).to_numpy().nonzero()[0]
+    # fallback: the first data-like row in your sample is row 7, so header is row 6
+    return int(hits[0]) if len(hits) else 6
+
+
+def _is_footer(row: Row) -> bool:
+    """The "Source: ..." / "Πηγή: ..." line under the table; nothing after it is data."""
+    first = row[0] if row else None
+    return isinstance(first, str) and first.strip().startswith(("Source", "Πηγή"))
 
 
 def extract_building_permits(xls_path: Path) -> pd.DataFrame:
@@ -19,92 +43,39 @@ def extract_building_permits(xls_path: Path) -> pd.DataFrame:
       * annual total row: Year in col0, month label in col1 (string)
       * monthly rows: Year empty, Month number in col1, values in col2..4
     We keep ONLY monthly rows (Month 1..12).
+
+    Vectorized: the year is forward-filled from the annual rows, month rows are picked
+    with a mask, and value columns are converted in bulk.
     """
     xls_path = Path(xls_path)
 
-    df = pd.read_excel(
-        xls_path,
-        sheet_name=0,
-        header=None,
-        engine=_engine_for(xls_path),
-    )
-
-    # Find header row (the row that contains "Year" and "Month"/"Μήνας")
-    header_idx = None
-    for i in range(min(len(df), 80)):
-        row = df.iloc[i].astype(str)
-        if row.str.contains("Year", case=False, na=False).any() and (
-            row.str.contains("Month", case=False, na=False).any()
-            or row.str.contains("Μήνας", case=False, na=False).any()
-        ):
-            header_idx = i
-            break
-    if header_idx is None:
-        # fallback: the first data-like row in your sample is row 7, so header is row 6
-        header_idx = 6
+    # The file effectively has 5 columns of interest; stream only those, up to the footer
+    df = read_sheet(xls_path, sheet=0, usecols=range(len(COLUMNS)), stop=_is_footer)
 
+    header_idx = _find_header_row(df)
     data = df.iloc[header_idx + 1 :].copy()
+    data.columns = COLUMNS
+
+    # Year only appears on annual total rows -> carry it down to the month rows
+    year = to_numeric(data["Year"], thousands=None, as_int=True).ffill()
+
+    # Month rows: numeric (not text like "Annual Total") and 1..12
+    month_raw = data["Month"].astype(object)
+    month = to_numeric(month_raw.where(~is_text(month_raw)), as_int=True)
+
+    keep = year.notna() & month.between(1, 12).fillna(False)
+    keep = keep.to_numpy(dtype=bool)
+    data = data[keep]
+
+    out = pd.DataFrame({
+        "Year": year[keep].astype("int64").to_numpy(),
+        "Month": month[keep].astype("int64").to_numpy(),
+    })
+    for c in VALUE_COLS:
+        # sometimes imported as text with commas
+        out[c] = to_numeric(data[c], as_int=True).reset_index(drop=True)
+
+    # If a row is malformed (no values at all), skip it
+    out = out[out[VALUE_COLS].notna().any(axis=1)]
 
-    # The file effectively has 5 columns of interest
-    data = data.iloc[:, :5]
-    data.columns = ["Year", "Month", "Permits Number", "Area", "Volume"]
-
-    records = []
-    current_year = None
-
-    for _, r in data.iterrows():
-        y = r["Year"]
-        m = r["Month"]
-
-        # Update current_year on annual total rows
-        if pd.notna(y):
-            try:
-                current_year = int(float(y))
-            except Exception:
-                pass
-
-        # Keep only month rows where Month is numeric 1..12
-        if pd.isna(m) or current_year is None:
-            continue
-        if isinstance(m, str):
-            # strings like "Annual Total" -> skip
-            continue
-
-        try:
-            month = int(float(m))
-        except Exception:
-            continue
-
-        if month < 1 or month > 12:
-            continue
-
-        def to_int(v):
-            if pd.isna(v):
-                return pd.NA
-            try:
-                return int(float(v))
-            except Exception:
-                # sometimes imported as text with commas
-                s = str(v).strip().replace(",", "")
-                return int(float(s)) if s else pd.NA
-
-        permits = to_int(r["Permits Number"])
-        area = to_int(r["Area"])
-        volume = to_int(r["Volume"])
-
-        # If a row is malformed, skip it
-        if pd.isna(permits) and pd.isna(area) and pd.isna(volume):
-            continue
-
-        records.append(
-            {
-                "Year": current_year,
-                "Month": month,
-                "Permits Number": permits,
-                "Area": area,
-                "Volume": volume,
-            }
-        )
-
-    out = pd.DataFrame(records).sort_values(["Year", "Month"]).reset_index(drop=True)
-    return out
+    return out.sort_values(["Year", "Month"], kind="stable").reset_index(drop=True)
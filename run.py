@@ -1,19 +1,84 @@
 ﻿import argparse
-from etl.core.runner import run_one, list_pipelines
+from etl.core.registry import get_spec
+from etl.core.runner import run_one, run_many, list_pipelines, format_summary
+from etl.core.state import get_store
 
 def main():
     p = argparse.ArgumentParser()
     p.add_argument("--pipeline", default=None)
     p.add_argument("--all", action="store_true")
+    p.add_argument("--list", action="store_true", help="list the pipelines (id, cadence, host, name)")
+    p.add_argument("--jobs", type=int, default=1, help="run --all with N pipelines in parallel")
+    p.add_argument("--per-host", type=int, default=2, help="max parallel pipelines per source host")
+    p.add_argument("--trace-memory", action="store_true",
+                   help="record peak memory per stage with tracemalloc (slower)")
+    p.add_argument("--probe", action="store_true",
+                   help="check which sources changed upstream (conditional HEAD, no download); "
+                        "with --all, then run only those")
+    p.add_argument("--schedule", action="store_true",
+                   help="run as a daemon: probe sources around their expected releases, run what changed "
+                        "(--jobs workers, --per-host, --deadline)")
+    p.add_argument("--deadline", type=float, default=1800, metavar="SECONDS",
+                   help="with --schedule: terminate a pipeline run after SECONDS")
+    p.add_argument("--stale", type=float, default=None, metavar="DAYS",
+                   help="list pipelines with no delivered run in the last DAYS days")
     args = p.parse_args()
 
-    if args.all:
+    if args.list:
         for pid in list_pipelines():
-            run_one(pid)
+            spec = get_spec(pid)
+            if spec is None:
+                print(f"{pid}  (not in registry.json)")
+            else:
+                print(f"{pid}  {spec.cadence:<9}  {spec.host}  {spec.display_name}")
+        return
+
+    if args.probe:
+        from etl.core.probe import format_probe, needs_run, probe_all  # requests: not needed for --list
+
+        results = probe_all([args.pipeline] if args.pipeline else None, concurrency=max(args.jobs, 8))
+        print(format_probe(results))
+        if not args.all:
+            return
+        todo = needs_run(results)
+        print(f"\nRunning {len(todo)} of {len(results)} pipelines: {', '.join(todo) or '-'}")
+        if todo:
+            results = run_many(todo, jobs=args.jobs, per_host=args.per_host, trace_memory=args.trace_memory)
+            print("\n" + format_summary(results))
+        return
+
+    if args.schedule:
+        from etl.core.scheduler import Scheduler, format_plan
+
+        sched = Scheduler(
+            [args.pipeline] if args.pipeline else None,
+            workers=args.jobs,
+            per_host=args.per_host,
+            deadline_s=args.deadline,
+        )
+        print(format_plan(sched.plan()))
+        sched.run_forever()
+        return
+
+    if args.stale is not None:
+        stale = get_store().not_delivered_since(args.stale, list_pipelines())
+        for pid, last in stale.items():
+            print(f"{pid}  last delivered: {last or 'never'}")
+        return
+
+    if args.all:
+        if args.jobs > 1:
+            results = run_many(
+                list_pipelines(), jobs=args.jobs, per_host=args.per_host, trace_memory=args.trace_memory
+            )
+            print("\n" + format_summary(results))
+        else:
+            for pid in list_pipelines():
+                run_one(pid, trace_memory=args.trace_memory)
     else:
         if not args.pipeline:
             raise SystemExit("Use --pipeline <id> or --all")
-        run_one(args.pipeline)
+        run_one(args.pipeline, trace_memory=args.trace_memory)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,82 @@
+# tests/conftest.py
+from __future__ import annotations
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+import pytest
+
+from etl.core.download import DownloadClient
+
+
+class FileServer:
+    """One file served over http://127.0.0.1 with ETag / Last-Modified, optional Range support."""
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.etag: Optional[str] = '"v1"'
+        self.last_modified: Optional[str] = "Wed, 01 Oct 2025 08:00:00 GMT"
+        self.ranges = True
+        self.truncate_at: Optional[int] = None  # next 200/206 stops after this many bytes
+        self.requests: List[Dict[str, Any]] = []
+        self.url = ""
+
+
+def _handler(srv: FileServer):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args) -> None:
+            pass
+
+        def do_GET(self) -> None:
+            headers = dict(self.headers)
+            srv.requests.append(headers)
+
+            if (srv.etag and headers.get("If-None-Match") == srv.etag) or (
+                srv.last_modified and headers.get("If-Modified-Since") == srv.last_modified
+            ):
+                self.send_response(304)
+                self.end_headers()
+                return
+
+            start = 0
+            rng = headers.get("Range")
+            if srv.ranges and rng and headers.get("If-Range") in (srv.etag, srv.last_modified):
+                start = int(rng.split("=")[1].split("-")[0])
+            body = srv.body[start:]
+
+            self.send_response(206 if start else 200)
+            if start:
+                self.send_header("Content-Range", f"bytes {start}-{len(srv.body) - 1}/{len(srv.body)}")
+            if srv.etag:
+                self.send_header("ETag", srv.etag)
+            if srv.last_modified:
+                self.send_header("Last-Modified", srv.last_modified)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+
+            if srv.truncate_at is not None:
+                body, srv.truncate_at = body[: srv.truncate_at], None
+                self.close_connection = True
+            self.wfile.write(body)
+
+    return Handler
+
+
+@pytest.fixture
+def file_server():
+    srv = FileServer(bytes(range(256)) * 4000)
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _handler(srv))
+    srv.url = f"http://127.0.0.1:{httpd.server_address[1]}/data.xlsx"
+    thread = threading.Thread(target=httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    yield srv
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def client():
+    c = DownloadClient(min_interval_s=0, max_retries=0, backoff_base_s=0, backoff_max_s=0)
+    yield c
+    c.close()
@@ -0,0 +1,85 @@
+# tests/test_changelog.py
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+
+from etl.core.changelog import ChangeLog
+from etl.core.compare import compare_frames
+from etl.core.download import sha256_file
+
+KEY = ["Year", "Month"]
+VALS = ["Permits Number", "Area"]
+PID = "ed_building_permits_table"
+
+
+def _frame(rows):
+    return pd.DataFrame(rows, columns=KEY + VALS).astype("int64")
+
+
+def _deliver(log: ChangeLog, base: pd.DataFrame, base_path, new: pd.DataFrame, out_path) -> int:
+    """One delivery: compare base vs new, write the result to out_path, log it."""
+    base_sha = sha256_file(base_path)
+    res = compare_frames(base, new, KEY, VALS)
+    res.updated_df.to_csv(out_path, index=False)
+    return log.log_compare(
+        PID, key_cols=KEY, base_df=base, report_df=res.report_df, updated_df=res.updated_df,
+        base_sha256=base_sha, out_path=out_path,
+    )
+
+
+def _same(got: pd.DataFrame, expected: pd.DataFrame) -> None:
+    expected = expected.sort_values(KEY).reset_index(drop=True)
+    pd.testing.assert_frame_equal(got[KEY + VALS].astype("int64"), expected, check_dtype=False)
+
+
+def test_db_as_of_replays_every_run(tmp_path):
+    log = ChangeLog(tmp_path / "changelog.sqlite")
+    db_path, out_path = tmp_path / "db.csv", tmp_path / "out.csv"
+
+    db = _frame([[2024, 1, 10, 100], [2024, 2, 11, 110]])
+    db.to_csv(db_path, index=False)
+
+    # run 1: one revision + one new month, compared against the DB file
+    run1 = _deliver(log, db, db_path, _frame([[2024, 1, 10, 100], [2024, 2, 12, 110], [2024, 3, 13, 130]]), out_path)
+    delivered1 = pd.read_csv(out_path)
+
+    # run 2: compared against run 1's deliverable -> no BASE copy needed
+    run2 = _deliver(log, delivered1, out_path, _frame([[2024, 3, 14, 130], [2024, 4, 15, 150]]), out_path)
+    delivered2 = pd.read_csv(out_path)
+
+    # run 3: the DB was edited by hand -> a new BASE
+    edited = _frame([[2024, 1, 99, 100]])
+    edited.to_csv(db_path, index=False)
+    run3 = _deliver(log, edited, db_path, _frame([[2024, 2, 20, 200]]), out_path)
+    delivered3 = pd.read_csv(out_path)
+
+    assert [r["has_base"] for r in log.runs(PID)] == [1, 0, 1]
+    _same(log.db_as_of(PID, run1), delivered1)
+    _same(log.db_as_of(PID, run2), delivered2)
+    _same(log.db_as_of(PID, run3), delivered3)
+    _same(log.db_as_of(PID), delivered3)
+
+
+def test_history_and_revision_counts(tmp_path):
+    log = ChangeLog(tmp_path / "changelog.sqlite")
+    db_path, out_path = tmp_path / "db.csv", tmp_path / "out.csv"
+    db = _frame([[2024, 1, 10, 100]])
+    db.to_csv(db_path, index=False)
+
+    _deliver(log, db, db_path, _frame([[2024, 1, 11, 100]]), out_path)
+    _deliver(log, pd.read_csv(out_path), out_path, _frame([[2024, 1, 12, 100]]), out_path)
+
+    hist = log.history(PID, [2024, 1], "Permits Number")
+    assert hist[["change_type", "old_value", "new_value"]].values.tolist() == [
+        ["UPDATE", 10, 11],
+        ["UPDATE", 11, 12],
+    ]
+    counts = log.revision_counts(PID)
+    assert counts.iloc[0].tolist() == [[2024, 1], 2, 2]
+
+
+def test_db_as_of_unknown_pipeline(tmp_path):
+    log = ChangeLog(tmp_path / "changelog.sqlite")
+    with pytest.raises(KeyError):
+        log.db_as_of("nope")
@@ -0,0 +1,107 @@
+# tests/test_download.py
+from __future__ import annotations
+
+import hashlib
+
+import pytest
+
+from etl.core.download import IncompleteDownload, download_file
+
+
+def test_conditional_get_etag_not_modified(file_server, client, tmp_path):
+    out = tmp_path / "data.xlsx"
+    first = download_file(file_server.url, out, client=client)
+    assert first["not_modified"] is False
+    assert first["etag"] == '"v1"'
+    assert first["sha256"] == hashlib.sha256(file_server.body).hexdigest()
+    assert out.read_bytes() == file_server.body
+
+    again = download_file(file_server.url, out, client=client, etag=first["etag"])
+    assert again["not_modified"] is True
+    assert file_server.requests[-1]["If-None-Match"] == '"v1"'
+    assert out.read_bytes() == file_server.body
+
+
+def test_conditional_get_last_modified(file_server, client, tmp_path):
+    file_server.etag = None
+    out = tmp_path / "data.xlsx"
+    first = download_file(file_server.url, out, client=client)
+
+    again = download_file(file_server.url, out, client=client, last_modified=first["last_modified"])
+    assert again["not_modified"] is True
+    assert file_server.requests[-1]["If-Modified-Since"] == file_server.last_modified
+
+
+def test_same_bytes_keep_existing_file(file_server, client, tmp_path):
+    out = tmp_path / "data.xlsx"
+    first = download_file(file_server.url, out, client=client)
+    mtime = out.stat().st_mtime_ns
+
+    again = download_file(file_server.url, out, client=client, prev_sha256=first["sha256"])
+    assert again["changed"] is False
+    assert out.stat().st_mtime_ns == mtime
+    assert not (tmp_path / "data.xlsx.part").exists()
+
+
+def test_interrupted_download_resumes_with_range(file_server, client, tmp_path):
+    out = tmp_path / "data.xlsx"
+    file_server.truncate_at = 300_000
+
+    with pytest.raises((IncompleteDownload, OSError)):
+        download_file(file_server.url, out, client=client, resume_attempts=0)
+    assert not out.exists()
+    # a chunk cut short by the dropped connection is not kept
+    part = (tmp_path / "data.xlsx.part").stat().st_size
+    assert 0 < part <= 300_000
+
+    meta = download_file(file_server.url, out, client=client)
+    assert file_server.requests[-1]["Range"] == f"bytes={part}-"
+    assert file_server.requests[-1]["If-Range"] == '"v1"'
+    assert meta["status_code"] == 206
+    assert meta["resumed_from"] == part
+    assert meta["sha256"] == hashlib.sha256(file_server.body).hexdigest()
+    assert out.read_bytes() == file_server.body
+    assert not (tmp_path / "data.xlsx.part").exists()
+    assert not (tmp_path / "data.xlsx.part.json").exists()
+
+
+def test_resume_within_one_call(file_server, client, tmp_path):
+    out = tmp_path / "data.xlsx"
+    file_server.truncate_at = 500_000
+
+    meta = download_file(file_server.url, out, client=client, resume_attempts=1)
+    assert len(file_server.requests) == 2
+    assert 0 < meta["resumed_from"] <= 500_000
+    assert meta["status_code"] == 206
+    assert out.read_bytes() == file_server.body
+
+
+def test_server_without_ranges_refetches_whole_file(file_server, client, tmp_path):
+    out = tmp_path / "data.xlsx"
+    file_server.truncate_at = 300_000
+    with pytest.raises((IncompleteDownload, OSError)):
+        download_file(file_server.url, out, client=client, resume_attempts=0)
+    part = (tmp_path / "data.xlsx.part").stat().st_size
+
+    file_server.ranges = False
+    meta = download_file(file_server.url, out, client=client)
+    assert file_server.requests[-1]["Range"] == f"bytes={part}-"
+    assert meta["status_code"] == 200
+    assert meta["resumed_from"] == 0
+    assert out.read_bytes() == file_server.body
+
+
+def test_changed_file_drops_stale_part(file_server, client, tmp_path):
+    out = tmp_path / "data.xlsx"
+    file_server.truncate_at = 300_000
+    with pytest.raises((IncompleteDownload, OSError)):
+        download_file(file_server.url, out, client=client, resume_attempts=0)
+
+    # new upstream version: If-Range no longer matches, the server sends the whole new file
+    file_server.body = file_server.body[::-1]
+    file_server.etag = '"v2"'
+    file_server.last_modified = "Thu, 02 Oct 2025 08:00:00 GMT"
+    meta = download_file(file_server.url, out, client=client)
+    assert meta["status_code"] == 200
+    assert meta["etag"] == '"v2"'
+    assert out.read_bytes() == file_server.body
@@ -0,0 +1,89 @@
+# tests/test_partition.py
+from __future__ import annotations
+
+import os
+
+import pandas as pd
+
+from etl.core.download import sha256_file
+from etl.core.fingerprint import file_signature, partition_sha256, plan_partition_compare
+
+PART = ["Year", "Month"]
+
+
+def _extract(permits_2024_2: int = 20) -> pd.DataFrame:
+    return pd.DataFrame({
+        "Year": [2024, 2024, 2024],
+        "Month": [1, 2, 3],
+        "Permits Number": [10, permits_2024_2, 30],
+    })
+
+
+def _delivered_state(df: pd.DataFrame, db_path, out_path) -> dict:
+    """State as the engine saves it after a delivery of df to out_path."""
+    df.to_csv(out_path, index=False)
+    return {
+        "partition_sha256": partition_sha256(df, PART),
+        "db_signature": file_signature(db_path),
+        "deliverable_path": str(out_path),
+        "deliverable_sha256": sha256_file(out_path),
+    }
+
+
+def test_partition_digests_follow_the_rows():
+    a = partition_sha256(_extract(), PART)
+    b = partition_sha256(_extract(21), PART)
+    assert sorted(a) == ["2024-1", "2024-2", "2024-3"]
+    assert [k for k in a if a[k] != b[k]] == ["2024-2"]
+    # row order does not matter
+    assert partition_sha256(_extract().iloc[::-1], PART) == a
+
+
+def test_first_run_is_a_full_compare(tmp_path):
+    db_path = tmp_path / "db.csv"
+    _extract().to_csv(db_path, index=False)
+
+    plan = plan_partition_compare(_extract(), {}, partition_cols=PART, db_path=db_path)
+    assert plan.changed is None
+    assert plan.base_path == db_path
+    assert len(plan.df) == 3
+    assert plan.db_signature == file_signature(db_path)
+
+
+def test_only_changed_partitions_against_previous_deliverable(tmp_path):
+    db_path, out_path = tmp_path / "db.csv", tmp_path / "out.csv"
+    _extract().to_csv(db_path, index=False)
+    state = _delivered_state(_extract(), db_path, out_path)
+
+    new = pd.concat([_extract(21), pd.DataFrame({"Year": [2024], "Month": [4], "Permits Number": [40]})])
+    plan = plan_partition_compare(new, state, partition_cols=PART, db_path=db_path)
+    assert plan.base_path == out_path
+    assert sorted(plan.changed) == ["2024-2", "2024-4"]
+    assert plan.df[PART].values.tolist() == [[2024, 2], [2024, 4]]
+    assert plan.hashes == partition_sha256(new, PART)
+
+    unchanged = plan_partition_compare(_extract(), state, partition_cols=PART, db_path=db_path)
+    assert unchanged.changed == [] and unchanged.df.empty
+
+
+def test_edited_db_falls_back_to_full_compare(tmp_path):
+    db_path, out_path = tmp_path / "db.csv", tmp_path / "out.csv"
+    _extract().to_csv(db_path, index=False)
+    state = _delivered_state(_extract(), db_path, out_path)
+
+    st = db_path.stat()
+    os.utime(db_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    plan = plan_partition_compare(_extract(21), state, partition_cols=PART, db_path=db_path)
+    assert plan.changed is None
+    assert plan.base_path == db_path
+
+
+def test_overwritten_deliverable_falls_back_to_full_compare(tmp_path):
+    db_path, out_path = tmp_path / "db.csv", tmp_path / "out.csv"
+    _extract().to_csv(db_path, index=False)
+    state = _delivered_state(_extract(), db_path, out_path)
+
+    out_path.write_text("Year,Month,Permits Number\n", encoding="utf-8")
+    plan = plan_partition_compare(_extract(21), state, partition_cols=PART, db_path=db_path)
+    assert plan.changed is None
+    assert plan.base_path == db_path